@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import math
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from difusion_lib import (
+    GeneradorRedes,
+    MotorDifusion,
+    ControladorPelado,
+    AnalizadorRIS,
+    AnalizadorCELF,
+    ConvertidorGrafos,
+    VisualizadorPelado
+)
+
+# Cada familia recibe un tamano objetivo en nodos y devuelve un GrafoCSR (generadores vectorizados).
+# sbm y gaussiana escalan grupos/radio para mantener el grado medio constante a lo largo de la escalera.
+FAMILIAS = {
+    'malla_netlogo': lambda n, s: GeneradorRedes.generar_malla_estocastica_netlogo_csr(
+        dim=max(2, int(round(math.sqrt(n)))), link_chance=40, semilla=s),
+    'cascada': lambda n, s: GeneradorRedes.generar_cascada_estricta_csr(
+        n_bloques=max(2, n // 4), nodos_por_bloque=4, semilla=s),
+    'flujo_libre': lambda n, s: GeneradorRedes.generar_flujo_libre_escala_csr(n_nodos=n, semilla=s),
+    'sbm': lambda n, s: GeneradorRedes.generar_sbm_estocastico_csr(
+        n_total=n, n_grupos=max(10, n // 30), semilla=s, p_fondo=min(0.001, 0.3 / n)),
+    'gaussiana': lambda n, s: GeneradorRedes.generar_red_gaussiana_csr(
+        n_nodos=n, radius=math.sqrt(6.3 / (math.pi * n)), semilla=s),
+    'red_social_realista': lambda n, s: GeneradorRedes.generar_red_social_realista_csr(n_users=n, semilla=s)
+}
+
+# Tamano maximo por operacion: CELF es O(n * mc) evaluaciones y spring_layout es cuadratico.
+LIMITES = {
+    'motor_ejecutar': None,
+    'pelado': None,
+    'pelado_cfc': None,
+    'ris': None,
+    'celf': 2000,
+    'a_igraph': None,
+    'figura_3d': 2000
+}
+
+ITERACIONES = 100
+MC_RIS = 1000
+MC_CELF = 64
+K_SEMILLAS = 5
+
+
+def _con_valores(G):
+    return G.con_valores({'val': np.ones(G.n_nodos)})
+
+
+def op_motor_ejecutar(G, G_nx):
+    motor = MotorDifusion(_con_valores(G), tasa_difusion=0.2)
+    motor.ejecutar(iteraciones=ITERACIONES)
+    return motor.iteraciones_realizadas * G.n_nodos, "nodo-iteraciones/s"
+
+
+def op_pelado(G, G_nx, usar_cfc=False):
+    _, _, _, pelados = ControladorPelado(G).ejecutar_estudio_pelado(
+        num_pelados=10, iteraciones_por_pelado=ITERACIONES, umbral_masa=1.0, tasa_difusion=0.2, usar_cfc=usar_cfc
+    )
+    return max(1, len(pelados)) * ITERACIONES * G.n_nodos, "nodo-iteraciones/s"
+
+
+def op_ris(G, G_nx):
+    AnalizadorRIS.ris(G, K_SEMILLAS, p=0.1, mc=MC_RIS, semilla=0)
+    return MC_RIS, "conjuntos RR/s"
+
+
+def op_celf(G, G_nx):
+    _, _, _, lookups = AnalizadorCELF.ejecutar_celf(G, K_SEMILLAS, p=0.1, mc=MC_CELF, semilla=0)
+    return sum(lookups) * MC_CELF, "simulaciones IC/s"
+
+
+def op_a_igraph(G, G_nx):
+    ConvertidorGrafos.a_igraph(G_nx)
+    return G.n_aristas, "aristas/s"
+
+
+def op_figura_3d(G, G_nx):
+    VisualizadorPelado.generar_figura_3d(G_nx, "benchmark")
+    return G.n_nodos, "nodos/s"
+
+
+OPERACIONES = {
+    'motor_ejecutar': op_motor_ejecutar,
+    'pelado': op_pelado,
+    'pelado_cfc': lambda G, G_nx: op_pelado(G, G_nx, usar_cfc=True),
+    'ris': op_ris,
+    'celf': op_celf,
+    'a_igraph': op_a_igraph,
+    'figura_3d': op_figura_3d
+}
+
+REQUIERE_NETWORKX = {'a_igraph', 'figura_3d'}
+
+
+def _silencioso(funcion, *args):
+    with open(os.devnull, 'w') as nulo:
+        salida, sys.stdout = sys.stdout, nulo
+        try:
+            return funcion(*args)
+        finally:
+            sys.stdout = salida
+
+
+def medir(operacion, G, G_nx, repeticiones=3, memoria=True):
+    # Mejor tiempo de 'repeticiones' corridas sin tracemalloc y, aparte, una corrida para el pico de memoria.
+    funcion = OPERACIONES[operacion]
+    tiempos = []
+    trabajo, unidad = 0, ""
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        trabajo, unidad = _silencioso(funcion, G, G_nx)
+        tiempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            _silencioso(funcion, G, G_nx)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    segundos = min(tiempos)
+    return {
+        'segundos': segundos,
+        'segundos_mediana': float(np.median(tiempos)),
+        'memoria_pico_bytes': pico,
+        'trabajo': trabajo,
+        'rendimiento': trabajo / segundos if segundos > 0 else None,
+        'unidad': unidad
+    }
+
+
+def escalera(minimo, maximo, factor):
+    tamanos, n = [], minimo
+    while n <= maximo:
+        tamanos.append(int(n))
+        n *= factor
+    return tamanos
+
+
+def ejecutar_benchmarks(tamanos, familias, operaciones, repeticiones=3, memoria=True, semilla=0, sin_limites=False):
+    resultados = []
+    for familia in familias:
+        for n in tamanos:
+            inicio = time.perf_counter()
+            G = FAMILIAS[familia](n, semilla)
+            t_generacion = time.perf_counter() - inicio
+            G_nx = None
+            print(f"{familia} n={G.n_nodos} m={G.n_aristas} (generado en {t_generacion:.3f} s)")
+
+            for operacion in operaciones:
+                limite = LIMITES.get(operacion)
+                if not sin_limites and limite is not None and n > limite:
+                    continue
+                if operacion in REQUIERE_NETWORKX and G_nx is None:
+                    G_nx = _con_valores(G).a_networkx()
+                medicion = medir(operacion, G, G_nx, repeticiones=repeticiones, memoria=memoria)
+                resultados.append({
+                    'operacion': operacion,
+                    'familia': familia,
+                    'n_objetivo': n,
+                    'n_nodos': G.n_nodos,
+                    'n_aristas': G.n_aristas,
+                    **medicion
+                })
+                print(f"   {operacion:<15} {medicion['segundos']:>10.4f} s  "
+                      f"{(medicion['rendimiento'] or 0):>14.1f} {medicion['unidad']}")
+    return resultados
+
+
+def metadatos():
+    import scipy
+    import networkx
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'networkx': networkx.__version__
+    }
+
+
+def comparar_con_linea_base(resultados, linea_base, tolerancia=0.25):
+    # Regresion: el mejor tiempo supera al de la linea base en mas de 'tolerancia' (fraccion).
+    base = {(r['operacion'], r['familia'], r['n_objetivo']): r for r in linea_base['resultados']}
+    regresiones = []
+    for r in resultados:
+        previo = base.get((r['operacion'], r['familia'], r['n_objetivo']))
+        if previo is None or not previo['segundos']:
+            continue
+        cambio = r['segundos'] / previo['segundos'] - 1
+        r['cambio_vs_linea_base'] = cambio
+        if cambio > tolerancia:
+            regresiones.append({**r, 'segundos_linea_base': previo['segundos']})
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los caminos criticos de difusion_lib.")
+    parser.add_argument('--min', type=int, default=100, help="Tamano minimo en nodos.")
+    parser.add_argument('--max', type=int, default=10000, help="Tamano maximo en nodos (p. ej. 1000000).")
+    parser.add_argument('--factor', type=int, default=10, help="Razon de la escalera geometrica de tamanos.")
+    parser.add_argument('--familias', nargs='+', default=list(FAMILIAS), choices=list(FAMILIAS))
+    parser.add_argument('--operaciones', nargs='+', default=list(OPERACIONES), choices=list(OPERACIONES))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--sin-memoria', action='store_true', help="No medir el pico de memoria (tracemalloc).")
+    parser.add_argument('--sin-limites', action='store_true', help="Ignorar los tamanos maximos por operacion.")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados",
+                                                         f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"))
+    parser.add_argument('--linea-base', default=None, help="JSON de una corrida anterior contra el cual comparar.")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    parser.add_argument('--guardar-linea-base', default=None, help="Ademas, escribe los resultados en esta ruta.")
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar_benchmarks(
+        escalera(args.min, args.max, args.factor), args.familias, args.operaciones,
+        repeticiones=args.repeticiones, memoria=not args.sin_memoria, semilla=args.semilla,
+        sin_limites=args.sin_limites
+    )
+
+    informe = {'metadatos': metadatos(), 'resultados': resultados}
+    regresiones = []
+    if args.linea_base:
+        with open(args.linea_base) as f:
+            regresiones = comparar_con_linea_base(resultados, json.load(f), args.tolerancia)
+        informe['linea_base'] = args.linea_base
+        informe['regresiones'] = regresiones
+
+    for ruta in filter(None, [args.salida, args.guardar_linea_base]):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with open(ruta, 'w') as f:
+            json.dump(informe, f, indent=2)
+        print(f"Resultados guardados en: {ruta}")
+
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones (> {args.tolerancia:.0%} mas lento que la linea base):")
+        for r in regresiones:
+            print(f"   {r['operacion']} {r['familia']} n={r['n_objetivo']}: "
+                  f"{r['segundos_linea_base']:.4f} s -> {r['segundos']:.4f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
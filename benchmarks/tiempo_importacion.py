@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lo que importa cada tipo de proceso: un worker de difusion solo necesita MotorDifusion.
+ESCENARIOS = {
+    'paquete': "import difusion_lib",
+    'motor': "from difusion_lib import MotorDifusion",
+    'bateria': "from difusion_lib import ProcesadorSimulaciones",
+    'completo': "from difusion_lib import *"
+}
+
+PESADOS = ('networkx', 'scipy', 'pandas', 'matplotlib', 'plotly', 'igraph')
+
+_SONDA = """
+import sys, time, json
+inicio = time.perf_counter()
+{sentencia}
+segundos = time.perf_counter() - inicio
+print(json.dumps({{'segundos': segundos, 'cargados': [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def medir_escenario(sentencia, repeticiones=5):
+    # Cada medicion en un interprete nuevo: sys.modules vacio, como un worker recien lanzado.
+    entorno = {**os.environ, 'PYTHONPATH': RAIZ + os.pathsep + os.environ.get('PYTHONPATH', '')}
+    codigo = _SONDA.format(sentencia=sentencia, pesados=PESADOS)
+    tiempos, cargados = [], []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                                env=entorno, check=True)
+        datos = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(datos['segundos'])
+        cargados = datos['cargados']
+    return {
+        'segundos': min(tiempos),
+        'segundos_mediana': statistics.median(tiempos),
+        'modulos_pesados': cargados
+    }
+
+
+def modulos_mas_lentos(sentencia, cantidad=15):
+    # Desglose de 'python -X importtime' (microsegundos acumulados por modulo).
+    entorno = {**os.environ, 'PYTHONPATH': RAIZ + os.pathsep + os.environ.get('PYTHONPATH', '')}
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", sentencia], capture_output=True,
+                            text=True, env=entorno, check=True)
+    filas = []
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, modulo = linea[len("import time:"):].split("|")
+        filas.append((int(acumulado), modulo.strip()))
+    return sorted(filas, reverse=True)[:cantidad]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de importacion de difusion_lib por escenario.")
+    parser.add_argument('--escenarios', nargs='+', default=list(ESCENARIOS), choices=list(ESCENARIOS))
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--desglose', action='store_true', help="Muestra los modulos mas lentos (-X importtime).")
+    parser.add_argument('--salida', default=None, help="Escribe los resultados en este JSON.")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for escenario in args.escenarios:
+        medicion = medir_escenario(ESCENARIOS[escenario], args.repeticiones)
+        resultados[escenario] = medicion
+        print(f"{escenario:<10} {medicion['segundos']:>8.3f} s  (mediana {medicion['segundos_mediana']:.3f} s)  "
+              f"pesados: {', '.join(medicion['modulos_pesados']) or '-'}")
+        if args.desglose:
+            for acumulado, modulo in modulos_mas_lentos(ESCENARIOS[escenario]):
+                print(f"      {acumulado / 1e6:>8.3f} s  {modulo}")
+
+    if args.salida:
+        os.makedirs(os.path.dirname(args.salida) or ".", exist_ok=True)
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Resultados guardados en: {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,36 @@
-from .motor_difusion import MotorDifusion
-from .analitica import AnalizadorPelado,AnalizadorCELF,AnalizadorRIS
-from .visualizador import VisualizadorPelado
-from .controlador import ControladorPelado
-from .generaradores import GeneradorRedes 
-from .herramientas import ConvertidorGrafos
-from .simulacion import ProcesadorSimulaciones
+import importlib
 
+# Carga perezosa (PEP 562): cada clase se importa desde su submodulo la primera vez que se pide,
+# de modo que un proceso que solo usa MotorDifusion no paga plotly, matplotlib, igraph ni pandas.
+_SUBMODULOS = {
+    'GrafoCSR': '.grafo_csr',
+    'MotorDifusion': '.motor_difusion',
+    'AnalizadorPelado': '.analitica',
+    'AnalizadorCELF': '.analitica',
+    'AnalizadorRIS': '.analitica',
+    'VisualizadorPelado': '.visualizador',
+    'ControladorPelado': '.controlador',
+    'GeneradorRedes': '.generaradores',
+    'ConvertidorGrafos': '.herramientas',
+    'CacheDifusion': '.cache_difusion',
+    'CargadorAristas': '.cargador_aristas',
+    'MemoriaCompartida': '.memoria_compartida',
+    'ManejadorMemoria': '.memoria_compartida',
+    'ProcesadorSimulaciones': '.simulacion'
+}
 
-__version__ = "1.0.2"
\ No newline at end of file
+__all__ = list(_SUBMODULOS)
+
+__version__ = "1.0.2"
+
+
+def __getattr__(nombre):
+    if nombre not in _SUBMODULOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(_SUBMODULOS[nombre], __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULOS))
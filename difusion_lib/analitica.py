@@ -1,15 +1,18 @@
-import networkx as nx
 import random
+import weakref
 import numpy as np
 import time
-from igraph import *
-import pandas as pd
-from collections import Counter
-import networkx as nx
+import math
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse.csgraph import connected_components
+from .grafo_csr import GrafoCSR
+from .memoria_compartida import MemoriaCompartida
 
 class AnalizadorPelado:
     @staticmethod
     def obtener_metricas_cfc(G, version_pelado, total_nodos_original):
+        import networkx as nx
         if G.is_directed():
             componentes = list(nx.strongly_connected_components(G))
         else:
@@ -29,6 +32,46 @@ class AnalizadorPelado:
             })
         return sorted(resultados, key=lambda x: x['masa_total'], reverse=True)
     
+    @staticmethod
+    def obtener_metricas_cfc_csr(A, masas, nodos, version_pelado, total_nodos_original, umbral_masa=None, vivos=None):
+        # Misma salida que obtener_metricas_cfc, pero etiquetando componentes sobre la matriz CSR
+        # y sumando masas con bincount; solo se arman registros para los componentes que pasan el umbral.
+        masas = np.asarray(masas, dtype=float)
+        idx = np.arange(A.shape[0]) if vivos is None else np.flatnonzero(vivos)
+        if len(idx) == 0:
+            return []
+        A_sub = A[idx][:, idx] if vivos is not None else A
+        masas_sub = masas[idx]
+
+        n_comp, etiquetas = connected_components(A_sub, directed=True, connection='strong')
+        masa_comp = np.bincount(etiquetas, weights=masas_sub, minlength=n_comp)
+        tamano_comp = np.bincount(etiquetas, minlength=n_comp)
+        lazo_comp = np.bincount(etiquetas, weights=(A_sub.diagonal() != 0), minlength=n_comp) > 0
+        trivial_comp = (tamano_comp == 1) & ~lazo_comp
+
+        pasan = np.arange(n_comp) if umbral_masa is None else np.flatnonzero(masa_comp >= umbral_masa)
+        if len(pasan) == 0:
+            return []
+        pasan = pasan[np.argsort(-masa_comp[pasan], kind='stable')]
+
+        orden = np.argsort(etiquetas, kind='stable')
+        inicio = np.concatenate(([0], np.cumsum(tamano_comp)))
+
+        resultados = []
+        for c in pasan:
+            miembros = idx[orden[inicio[c]:inicio[c + 1]]]
+            masa = masa_comp[c]
+            resultados.append({
+                'capa_pelado': version_pelado + 1,
+                'id_componente': f"P{version_pelado+1}_C{c}",
+                'nodos': sorted(nodos[i] for i in miembros),
+                'tamano': int(tamano_comp[c]),
+                'es_trivial': bool(trivial_comp[c]),
+                'masa_total': masa,
+                'impacto_global': masa / total_nodos_original if total_nodos_original > 0 else 0
+            })
+        return resultados
+
     @staticmethod
     def nodos_para_quitar(G, version_pelado, total_nodos_original, umbral_masa=1.0):
         resultados = []
@@ -68,76 +111,554 @@ class AnalizadorRIS:
         return RRS
 
     @staticmethod
-    def ris(G, k, p=0.5, mc=1000):    
+    def csr_inverso(G):
+        # Adyacencia inversa (target -> sources) del DataFrame de aristas, construida una sola vez.
+        # Un GrafoCSR ya la trae; las raices son los nodos con al menos una arista de salida.
+        if isinstance(G, GrafoCSR):
+            return G.nodes(), G.indptr_inv, G.indices_inv, np.flatnonzero(G.grados_salida() > 0)
+        fuentes = G['source'].to_numpy()
+        destinos = G['target'].to_numpy()
+        nodos, codigos = np.unique(np.concatenate([fuentes, destinos]), return_inverse=True)
+        codigos = codigos.ravel()
+        src, dst = codigos[:len(fuentes)], codigos[len(fuentes):]
+
+        orden = np.argsort(dst, kind='stable')
+        indptr = np.zeros(len(nodos) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=len(nodos)), out=indptr[1:])
+        indices = src[orden]
+        raices = np.unique(src)
+        return nodos.tolist(), indptr, indices, raices
+
+    @staticmethod
+    def muestrear_RRS(indptr, indices, raices, p, mc, rng=None):
+        # Cada conjunto RR es un BFS inverso que solo lanza monedas sobre las aristas que toca.
+        # Los conjuntos quedan aplanados: los del conjunto i son rr_indices[rr_indptr[i]:rr_indptr[i+1]].
+        rng = np.random.default_rng() if rng is None else rng
+        marca = np.full(len(indptr) - 1, -1, dtype=np.int64)
+        rr_indptr = np.zeros(mc + 1, dtype=np.int64)
+        bloques = []
+
+        for i, raiz in enumerate(raices[rng.integers(0, len(raices), mc)] if mc > 0 else []):
+            marca[raiz] = i
+            frontera = np.array([raiz])
+            total = 1
+            bloques.append(frontera)
+            while len(frontera) > 0:
+                inicio = indptr[frontera]
+                grados = indptr[frontera + 1] - inicio
+                n_aristas = grados.sum()
+                if n_aristas == 0:
+                    break
+                aristas = np.repeat(inicio - (np.cumsum(grados) - grados), grados) + np.arange(n_aristas)
+                vecinos = indices[aristas[rng.random(n_aristas) < p]]
+                frontera = np.unique(vecinos[marca[vecinos] != i])
+                marca[frontera] = i
+                total += len(frontera)
+                bloques.append(frontera)
+            rr_indptr[i + 1] = rr_indptr[i] + total
+
+        rr_indices = np.concatenate(bloques) if bloques else np.zeros(0, dtype=np.int64)
+        return rr_indptr, rr_indices
+
+    @staticmethod
+    def ris(G, k, p=0.5, mc=1000, semilla=None):    
         start_time = time.time()
-        R = [AnalizadorRIS.get_RRS(G, p) for _ in range(mc)]
-        
-        SEED, timelapse = [], []
-        for _ in range(k):
+        rng = np.random.default_rng(semilla)
+        nodos, indptr, indices, raices = AnalizadorRIS.csr_inverso(G)
+        if len(raices) == 0:
+            return [], []
+        rr_indptr, rr_indices = AnalizadorRIS.muestrear_RRS(indptr, indices, raices, p, mc, rng)
+
+        semillas, _, timelapse = AnalizadorRIS.seleccion_greedy(rr_indptr, rr_indices, len(nodos), k, start_time)
+        SEED = [nodos[u] for u in semillas]
             
-            flat_list = [item for sublist in R for item in sublist]
-            if not flat_list: 
+        return sorted(SEED), timelapse
+
+    @staticmethod
+    def ris_imm(G, k, p=0.5, epsilon=0.5, ell=1, semilla=None):
+        # IMM (Tang et al., 2015): estima una cota inferior del optimo con la fase martingala y de
+        # ahi el numero theta de conjuntos RR que garantiza (1 - 1/e - epsilon) con prob. 1 - n^-ell.
+        # Las raices se eligen uniformes entre todos los nodos, como exige la garantia.
+        start_time = time.time()
+        rng = np.random.default_rng(semilla)
+        nodos, indptr, indices, _ = AnalizadorRIS.csr_inverso(G)
+        n = len(nodos)
+        if n == 0:
+            return [], [], {'theta': 0, 'LB': 0.0, 'tiempo_cota': 0.0, 'tiempo_muestreo': 0.0, 'tiempo_seleccion': 0.0}
+        k = min(k, n)
+        raices = np.arange(n)
+
+        log_n = math.log(max(n, 2))
+        ell = ell * (1 + math.log(2) / log_n)
+        log_cnk = math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+        eps_p = math.sqrt(2) * epsilon
+
+        rr_indptr, rr_indices = np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        def ampliar(rr_indptr, rr_indices, objetivo):
+            faltan = objetivo - (len(rr_indptr) - 1)
+            if faltan <= 0:
+                return rr_indptr, rr_indices
+            nuevo_indptr, nuevo_indices = AnalizadorRIS.muestrear_RRS(indptr, indices, raices, p, faltan, rng)
+            return (np.concatenate([rr_indptr, nuevo_indptr[1:] + rr_indptr[-1]]),
+                    np.concatenate([rr_indices, nuevo_indices]))
+
+        LB = 1.0
+        lambda_p = (2 + 2 * eps_p / 3) * (log_cnk + ell * log_n + math.log(max(math.log2(n), 1))) * n / eps_p ** 2
+        for i in range(1, int(math.log2(n))):
+            x = n / 2 ** i
+            theta_i = math.ceil(lambda_p / x)
+            rr_indptr, rr_indices = ampliar(rr_indptr, rr_indices, theta_i)
+            _, cubiertos, _ = AnalizadorRIS.seleccion_greedy(rr_indptr, rr_indices, n, k)
+            estimado = n * cubiertos / (len(rr_indptr) - 1)
+            if estimado >= (1 + eps_p) * x:
+                LB = estimado / (1 + eps_p)
+                break
+        tiempo_cota = time.time() - start_time
+
+        alpha = math.sqrt(ell * log_n + math.log(2))
+        beta = math.sqrt((1 - 1 / math.e) * (log_cnk + ell * log_n + math.log(2)))
+        lambda_estrella = 2 * n * ((1 - 1 / math.e) * alpha + beta) ** 2 / epsilon ** 2
+        theta = math.ceil(lambda_estrella / LB)
+        rr_indptr, rr_indices = ampliar(rr_indptr, rr_indices, theta)
+        tiempo_muestreo = time.time() - start_time - tiempo_cota
+
+        inicio_seleccion = time.time()
+        semillas, _, timelapse = AnalizadorRIS.seleccion_greedy(rr_indptr[:theta + 1], rr_indices[:rr_indptr[theta]], n, k, start_time)
+        tiempo_seleccion = time.time() - inicio_seleccion
+
+        info = {
+            'theta': theta,
+            'LB': LB,
+            'tiempo_cota': tiempo_cota,
+            'tiempo_muestreo': tiempo_muestreo,
+            'tiempo_seleccion': tiempo_seleccion
+        }
+        return sorted(nodos[u] for u in semillas), timelapse, info
+
+    @staticmethod
+    def seleccion_greedy(rr_indptr, rr_indices, n_nodos, k, start_time=None):
+        # Cobertura maxima con indice invertido nodo -> conjuntos RR y un conteo vivo por nodo:
+        # al elegir una semilla solo se descuentan (con subtract.at, sin recorrer los n nodos) los
+        # miembros de los conjuntos que acaba de cubrir.
+        n_rr = len(rr_indptr) - 1
+        conjunto_de = np.repeat(np.arange(n_rr), np.diff(rr_indptr))
+        inv_indptr = np.zeros(n_nodos + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rr_indices, minlength=n_nodos), out=inv_indptr[1:])
+        inv_conjuntos = conjunto_de[np.argsort(rr_indices, kind='stable')]
+
+        conteo = np.diff(inv_indptr)
+        cubierto = np.zeros(n_rr, dtype=bool)
+        start_time = time.time() if start_time is None else start_time
+        semillas, n_cubiertos, timelapse = [], 0, []
+        for _ in range(k):
+            u = int(np.argmax(conteo))
+            if conteo[u] == 0:
                 break
-                
-            seed = Counter(flat_list).most_common()[0][0]
-            SEED.append(seed)
-            R = [rrs for rrs in R if seed not in rrs]
+            semillas.append(u)
+
+            nuevos = inv_conjuntos[inv_indptr[u]:inv_indptr[u + 1]]
+            nuevos = nuevos[~cubierto[nuevos]]
+            cubierto[nuevos] = True
+            n_cubiertos += len(nuevos)
+
+            inicio = rr_indptr[nuevos]
+            largos = rr_indptr[nuevos + 1] - inicio
+            posiciones = np.repeat(inicio - (np.cumsum(largos) - largos), largos) + np.arange(largos.sum())
+            np.subtract.at(conteo, rr_indices[posiciones], 1)
             timelapse.append(time.time() - start_time)
-            
-        return sorted(SEED), timelapse
+        return semillas, n_cubiertos, timelapse
 
 class AnalizadorCELF:
+    BLOQUE_MONEDAS = 1 << 14
+
+    @staticmethod
+    def csr_salida(g):
+        # g puede ser un GrafoCSR, una tupla (indptr, indices) ya armada o un grafo de igraph. El CSR de
+        # un grafo de igraph se arma una vez y se guarda mientras el grafo viva y no cambie su tamano;
+        # quien llama a IC en un bucle puede tambien armarlo antes y pasar la tupla.
+        if isinstance(g, GrafoCSR):
+            return g.indptr, g.indices
+        if isinstance(g, tuple):
+            return g
+        firma = (g.vcount(), g.ecount(), g.is_directed())
+        guardado = _CSR_IGRAPH.get(id(g))
+        if guardado is not None and guardado[0]() is g and guardado[1] == firma:
+            return guardado[2]
+        n = g.vcount()
+        aristas = np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        if not g.is_directed():
+            aristas = np.vstack([aristas, aristas[:, ::-1]])
+        orden = np.argsort(aristas[:, 0], kind='stable')
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(aristas[:, 0], minlength=n), out=indptr[1:])
+        csr = (indptr, aristas[orden, 1])
+        # igraph.Graph no es hashable: se indexa por id() y la entrada se borra cuando el grafo muere.
+        _CSR_IGRAPH[id(g)] = (weakref.ref(g, lambda _, clave=id(g): _CSR_IGRAPH.pop(clave, None)), firma, csr)
+        return csr
+
+    @staticmethod
+    def _monedas(rng, m, p):
+        # Un uint64 por arista: el bit j indica si la arista transmite en el mundo j.
+        monedas = np.empty(m, dtype=np.uint64)
+        for a in range(0, m, AnalizadorCELF.BLOQUE_MONEDAS):
+            b = min(m, a + AnalizadorCELF.BLOQUE_MONEDAS)
+            bits = np.packbits(rng.random((b - a, 64)) < p, axis=1, bitorder='little')
+            monedas[a:b] = bits.view(np.uint64).ravel()
+        return monedas
+
+    @staticmethod
+    def _popcount(x):
+        if hasattr(np, 'bitwise_count'):
+            return int(np.bitwise_count(x).sum())
+        return int(np.unpackbits(x.view(np.uint8)).sum())
+
+    @staticmethod
+    def _estado_cero(forma):
+        # Arreglo de estado reutilizable, siempre en cero entre llamadas: cada simulacion escribe solo en
+        # los nodos que alcanza y al terminar pone en cero esos mismos nodos, asi el costo sigue a las
+        # aristas recorridas y no a n.
+        if forma not in _ESTADOS_IC:
+            _ESTADOS_IC[forma] = np.zeros(forma, dtype=np.uint64)
+        return _ESTADOS_IC[forma]
+
+    @staticmethod
+    def _ronda_ic(indptr, indices, frontera, mascaras, p, rng):
+        # Una ronda de la cascada desde 'frontera' (mascaras = mundos en que cada nodo se acaba de activar).
+        # Devuelve los destinos alcanzados (sin repetir, en orden) y la union de mundos que llega a cada uno.
+        desde = indptr[frontera]
+        grados = indptr[frontera + 1] - desde
+        m = grados.sum()
+        if m == 0:
+            return frontera[:0], mascaras[:0]
+        aristas = np.repeat(desde - (np.cumsum(grados) - grados), grados) + np.arange(m)
+        monedas = AnalizadorCELF._monedas(rng, m, p)
+        llegan = np.repeat(mascaras, grados, axis=0) & (monedas if mascaras.ndim == 1 else monedas[:, None])
+        vivas = np.flatnonzero(llegan if llegan.ndim == 1 else llegan.any(axis=1))
+        if len(vivas) == 0:
+            return frontera[:0], mascaras[:0]
+        # Destinos ordenados y agrupados: la union de mundos por destino sale de un solo reduceat.
+        destinos = indices[aristas[vivas]]
+        orden = np.argsort(destinos, kind='stable')
+        destinos = destinos[orden]
+        primeros = np.flatnonzero(np.concatenate(([True], destinos[1:] != destinos[:-1])))
+        return destinos[primeros], np.bitwise_or.reduceat(llegan[vivas[orden]], primeros, axis=0)
+
+    @staticmethod
+    def IC_csr(indptr, indices, S, p=0.5, mc=1000, rng=None):
+        # Simula 64 mundos a la vez: el estado activo de cada nodo es una mascara uint64.
+        rng = np.random if rng is None else rng
+        S = np.unique(np.asarray(S, dtype=np.int64))
+        activos = AnalizadorCELF._estado_cero(len(indptr) - 1)
+        total = 0
+        for inicio in range(0, mc, 64):
+            lleno = np.uint64((1 << min(64, mc - inicio)) - 1)
+            frontera, mascaras = S, np.full(len(S), lleno, dtype=np.uint64)
+            tocados, alcanzados = [S], [mascaras]
+            try:
+                while len(frontera) > 0:
+                    activos[frontera] |= mascaras
+                    destinos, recibidos = AnalizadorCELF._ronda_ic(indptr, indices, frontera, mascaras, p, rng)
+                    recibidos &= ~activos[destinos]
+                    nuevos = recibidos != 0
+                    frontera, mascaras = destinos[nuevos], recibidos[nuevos]
+                    tocados.append(frontera)
+                    alcanzados.append(mascaras)
+            finally:
+                activos[np.concatenate(tocados)] = 0
+            total += AnalizadorCELF._popcount(np.concatenate(alcanzados))
+        return total / mc
+
+    @staticmethod
+    def IC_conjuntos_csr(indptr, indices, conjuntos, p=0.5, mc=1000, rng=None):
+        # Varios conjuntos semilla sobre las mismas cascadas (columna j = conjuntos[j]): cada arista se
+        # sortea una vez por ronda y la moneda vale para todas las columnas que la recorren en esa ronda.
+        rng = np.random if rng is None else rng
+        P = len(conjuntos)
+        activos = AnalizadorCELF._estado_cero((len(indptr) - 1, P))
+        semillas = np.unique(np.concatenate([np.empty(0, dtype=np.int64)] + [np.asarray(S, dtype=np.int64).ravel() for S in conjuntos]))
+        totales = np.zeros(P)
+        for inicio in range(0, mc, 64):
+            lleno = np.uint64((1 << min(64, mc - inicio)) - 1)
+            mascaras = np.zeros((len(semillas), P), dtype=np.uint64)
+            for j, S in enumerate(conjuntos):
+                mascaras[np.searchsorted(semillas, np.asarray(S, dtype=np.int64)), j] = lleno
+            frontera = semillas
+            tocados, alcanzados = [semillas], [mascaras]
+            try:
+                while len(frontera) > 0:
+                    activos[frontera] |= mascaras
+                    destinos, recibidos = AnalizadorCELF._ronda_ic(indptr, indices, frontera, mascaras, p, rng)
+                    recibidos &= ~activos[destinos]
+                    nuevos = recibidos.any(axis=1)
+                    frontera, mascaras = destinos[nuevos], recibidos[nuevos]
+                    tocados.append(frontera)
+                    alcanzados.append(mascaras)
+            finally:
+                activos[np.concatenate(tocados)] = 0
+            alcanzados = np.concatenate(alcanzados)
+            totales += [AnalizadorCELF._popcount(np.ascontiguousarray(alcanzados[:, j])) for j in range(P)]
+        return totales / mc
+
     @staticmethod
     def IC(g, S, p=0.5, mc=1000):
-        spread = []
-        for i in range(mc):
-            new_active, A = list(S), list(S)
-            while new_active:
-                new_ones = []
-                for node in new_active:
-                    neighbors = g.neighbors(node, mode="out")
-                    if not neighbors:
-                        continue
-                    success = np.random.uniform(0, 1, len(neighbors)) < p
-                    new_ones += [neighbors[j] for j, is_success in enumerate(success) if is_success]
-                new_active = list(set(new_ones) - set(A))
-                A += new_active
-            spread.append(len(A))
-        return np.mean(spread)
-
-    @staticmethod
-    def ejecutar_celf(g, k, p=0.1, mc=1000):
+        indptr, indices = AnalizadorCELF.csr_salida(g)
+        return AnalizadorCELF.IC_csr(indptr, indices, S, p, mc)
+
+    @staticmethod
+    def ejecutar_celf(g, k, p=0.1, mc=1000, mundos_fijos=False, semilla=None, celfpp=False, n_workers=None):
+        # Cola CELF sobre un heap. Con celfpp=True cada nodo guarda ademas mg2, su ganancia respecto
+        # a S + prev_best, calculada en la misma evaluacion que mg1; si prev_best resulta ser la
+        # semilla elegida se ahorra la reevaluacion.
+        # LOOKUPS cuenta las evaluaciones de spread hechas para elegir cada semilla.
+        # Con un GrafoCSR las semillas se devuelven como ids de nodo; con igraph, como indices de vertice.
         start_time = time.time()
         # print(f"CELF: Calculando ganancia marginal inicial para {g.vcount()} nodos...")
-        marg_gain = [AnalizadorCELF.IC(g, [node], p, mc) for node in range(g.vcount())]
-        Q = sorted(zip(range(g.vcount()), marg_gain), key=lambda x: x[1], reverse=True)
-        S = [Q[0][0]]
-        spread = Q[0][1]
-        SPREAD = [spread]
-        Q = Q[1:] 
-        
-        LOOKUPS = [g.vcount()]
-        timelapse = [time.time() - start_time]
-        for i in range(k - 1):
-            check = False
-            node_lookup = 0
-            
-            while not check:
-                node_lookup += 1
-                current_node = Q[0][0]
-            
-                nueva_ganancia = AnalizadorCELF.IC(g, S + [current_node], p, mc) - spread
+        indptr, indices = AnalizadorCELF.csr_salida(g)
+        n = len(indptr) - 1
+        rng = np.random if semilla is None else np.random.default_rng(semilla)
+        if mundos_fijos:
+            evaluador = _MundosVivos(indptr, indices, p, mc, rng)
+        else:
+            evaluador = _EvaluadorMonteCarlo(indptr, indices, p, mc, rng)
 
-                Q[0] = (current_node, nueva_ganancia)
-                Q = sorted(Q, key=lambda x: x[1], reverse=True)
-                check = (Q[0][0] == current_node)
+        mg1, mg2, prev_best, flag = {}, {}, {}, {}
+        cur_best = None
+        Q = []
+        if n_workers is not None and n_workers > 1:
+            AnalizadorCELF._ganancias_iniciales_paralelo(
+                evaluador, n, n_workers, semilla, celfpp, mg1, mg2, prev_best
+            )
+        for node in range(n):
+            if n_workers is None or n_workers <= 1:
+                prev_best[node] = cur_best
+                if celfpp:
+                    mg1[node], mg2[node] = evaluador.ganancias(node, extra=cur_best)
+                else:
+                    mg1[node] = evaluador.ganancia(node)
+            flag[node] = 0
+            if cur_best is None or mg1[node] > mg1[cur_best]:
+                cur_best = node
+            heapq.heappush(Q, (-mg1[node], node))
 
-            spread += Q[0][1]
-            S.append(Q[0][0])
-            SPREAD.append(spread)
-            LOOKUPS.append(node_lookup)
-            timelapse.append(time.time() - start_time)
-            Q = Q[1:]
-            # print(f"Semilla {i+2} seleccionada: {S[-1]} | Spread total: {spread:.2f}")
+        S, SPREAD, timelapse, LOOKUPS = [], [], [], []
+        last_seed, cur_best = None, None
+        evaluaciones_previas = 0
+        while len(S) < k and Q:
+            _, u = heapq.heappop(Q)
+            if flag[u] == len(S):
+                evaluador.agregar(u, mg1[u])
+                S.append(u)
+                SPREAD.append(evaluador.spread)
+                LOOKUPS.append(evaluador.evaluaciones - evaluaciones_previas)
+                timelapse.append(time.time() - start_time)
+                evaluaciones_previas = evaluador.evaluaciones
+                last_seed, cur_best = u, None
+                # print(f"Semilla {len(S)} seleccionada: {u} | Spread total: {evaluador.spread:.2f}")
+                continue
+
+            if celfpp and prev_best[u] == last_seed and flag[u] == len(S) - 1:
+                mg1[u] = mg2[u]
+            else:
+                prev_best[u] = cur_best
+                if celfpp:
+                    mg1[u], mg2[u] = evaluador.ganancias(u, extra=cur_best)
+                else:
+                    mg1[u] = evaluador.ganancia(u)
+            flag[u] = len(S)
+            if cur_best is None or mg1[u] > mg1[cur_best]:
+                cur_best = u
+            heapq.heappush(Q, (-mg1[u], u))
+
+        if isinstance(g, GrafoCSR):
+            ids = g.nodes()
+            S = [ids[u] for u in S]
+        return S, SPREAD, timelapse, LOOKUPS
+
+
+    TAMANO_TAREA = 128
+
+    @staticmethod
+    def _ganancias_iniciales_paralelo(evaluador, n, n_workers, semilla, celfpp, mg1, mg2, prev_best):
+        # Las ganancias iniciales son independientes entre si: se reparten en tareas de tamano fijo,
+        # cada una con su propio flujo de SeedSequence, asi el resultado no depende de n_workers.
+        # El CSR (y los mundos vivos) se publican una vez en memoria compartida: cada worker los
+        # adjunta sin copiar en lugar de recibir su propia copia serializada.
+        semillas_tareas = np.random.SeedSequence(semilla)
+        vivas = evaluador.vivas if isinstance(evaluador, _MundosVivos) else None
+        arreglos = {'indptr': evaluador.indptr, 'indices': evaluador.indices}
+        if vivas is not None:
+            arreglos['vivas'] = vivas
+        with MemoriaCompartida(arreglos) as memoria, ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_inicializar_trabajador_ic,
+            initargs=(memoria.manejador, evaluador.p if vivas is None else None,
+                      evaluador.mc if vivas is None else evaluador.R)
+        ) as pool:
+            def evaluar(conjuntos):
+                tareas = [conjuntos[a:a + AnalizadorCELF.TAMANO_TAREA]
+                          for a in range(0, len(conjuntos), AnalizadorCELF.TAMANO_TAREA)]
+                flujos = semillas_tareas.spawn(len(tareas))
+                evaluador.evaluaciones += len(conjuntos)
+                return [x for parcial in pool.map(_sigmas_trabajador_ic, tareas, flujos) for x in parcial]
+
+            for node, valor in enumerate(evaluar([[node] for node in range(n)])):
+                mg1[node] = valor
+
+        # prev_best depende de las ganancias de los nodos anteriores, asi que en paralelo no se conoce
+        # al evaluar: mg2 quedaria en una segunda ronda de n evaluaciones, mas cara que lo que ahorra.
+        # Sin prev_best, CELF++ empieza a usar mg2 desde la primera reevaluacion de cada nodo.
+        for node in range(n):
+            prev_best[node] = None
+            if celfpp:
+                mg2[node] = mg1[node]
+
+
+# CSR de salida de cada grafo de igraph visto por csr_salida; se libera junto con el grafo.
+_CSR_IGRAPH = {}
+
+# Estados en cero de IC_csr / IC_conjuntos_csr por forma (n,) o (n, P), reutilizados entre llamadas.
+_ESTADOS_IC = {}
+
+_ESTADO_TRABAJADOR_IC = {}
+
+
+def _inicializar_trabajador_ic(manejador, p, mc):
+    arreglos = manejador.arreglos()
+    _ESTADO_TRABAJADOR_IC.update(indptr=arreglos['indptr'], indices=arreglos['indices'], p=p, mc=mc,
+                                 vivas=arreglos.get('vivas'))
+
+
+def _sigmas_trabajador_ic(conjuntos, flujo):
+    e = _ESTADO_TRABAJADOR_IC
+    if e['vivas'] is not None:
+        mundos = _MundosVivos(e['indptr'], e['indices'], None, e['mc'], None, vivas=e['vivas'])
+        return [mundos.sigma(S) for S in conjuntos]
+    rng = np.random.default_rng(flujo)
+    return [AnalizadorCELF.IC_csr(e['indptr'], e['indices'], S, e['p'], e['mc'], rng) for S in conjuntos]
+
+
+class _EvaluadorMonteCarlo:
+    # Cada ganancia se estima con cascadas nuevas: sigma(S + [u]) - sigma(S).
+    def __init__(self, indptr, indices, p, mc, rng):
+        self.indptr, self.indices = indptr, indices
+        self.p, self.mc, self.rng = p, mc, rng
+        self.S = []
+        self.spread = 0.0
+        self.evaluaciones = 0
+        self._sigma_con = {}
+
+    def sigma(self, semillas):
+        return AnalizadorCELF.IC_csr(self.indptr, self.indices, semillas, self.p, self.mc, self.rng)
+
+    def _sigma(self, semillas):
+        self.evaluaciones += 1
+        return AnalizadorCELF.IC_csr(self.indptr, self.indices, semillas, self.p, self.mc, self.rng)
+
+    def ganancia(self, u):
+        return self._sigma(self.S + [u]) - self.spread
+
+    def ganancias(self, u, extra=None):
+        # CELF++: S + u y S + extra + u corren sobre las mismas cascadas en una sola evaluacion.
+        # sigma(S + extra) ya se estimo al evaluar extra en esta ronda; si no (extra tomo su ganancia
+        # de mg2 sin reevaluarse) se agrega S + extra a esas mismas cascadas.
+        if extra is None:
+            con_u = self._sigma(self.S + [u])
+            self._sigma_con[u] = con_u
+            return con_u - self.spread, con_u - self.spread
+        self.evaluaciones += 1
+        conjuntos = [self.S + [u], self.S + [extra, u]]
+        if extra not in self._sigma_con:
+            conjuntos.append(self.S + [extra])
+        sigmas = AnalizadorCELF.IC_conjuntos_csr(self.indptr, self.indices, conjuntos, self.p, self.mc,
+                                                self.rng).tolist()
+        if len(sigmas) > 2:
+            self._sigma_con[extra] = sigmas[2]
+        self._sigma_con[u] = sigmas[0]
+        return sigmas[0] - self.spread, sigmas[1] - self._sigma_con[extra]
+
+    def agregar(self, u, ganancia):
+        self.S.append(u)
+        self.spread += ganancia
+        self._sigma_con = {}
+
+
+class _MundosVivos:
+    # R mundos de aristas vivas muestreados una sola vez (StaticGreedy): la arista e esta viva en el
+    # mundo 64*b + j si el bit j de vivas[e, b] vale 1. Cada mundo recuerda que nodos alcanza ya S,
+    # asi la ganancia de u solo recorre lo que u alcanza fuera de ese conjunto.
+    def __init__(self, indptr, indices, p, R, rng, vivas=None):
+        self.indptr, self.indices, self.R = indptr, indices, R
+        n_bloques = -(-R // 64)
+        if vivas is None:
+            vivas = np.empty((len(indices), n_bloques), dtype=np.uint64)
+            for b in range(n_bloques):
+                vivas[:, b] = AnalizadorCELF._monedas(rng, len(indices), p)
+        self.vivas = vivas
+        self.llenos = np.array([(1 << min(64, R - 64 * b)) - 1 for b in range(n_bloques)], dtype=np.uint64)
+        self.alcanzados = np.zeros((len(indptr) - 1, n_bloques), dtype=np.uint64)
+        self._n_alcanzados = 0
+        self._con_extra, self._mejor = {}, None
+        self.S = []
+        self.spread = 0.0
+        self.evaluaciones = 0
+
+    def _alcanzar(self, fuentes, base=None):
+        activos = (self.alcanzados if base is None else base).copy()
+        fuentes = np.unique(np.atleast_1d(np.asarray(fuentes, dtype=np.int64)))
+        nuevos = np.zeros_like(activos)
+        nuevos[fuentes] = self.llenos & ~activos[fuentes]
+        activos[fuentes] |= nuevos[fuentes]
+        frontera = fuentes[nuevos[fuentes].any(axis=1)]
+        while len(frontera) > 0:
+            desde = self.indptr[frontera]
+            grados = self.indptr[frontera + 1] - desde
+            m = grados.sum()
+            if m == 0:
+                break
+            aristas = np.repeat(desde - (np.cumsum(grados) - grados), grados) + np.arange(m)
+            llegan = np.repeat(nuevos[frontera], grados, axis=0) & self.vivas[aristas]
+            nuevos = np.zeros_like(activos)
+            np.bitwise_or.at(nuevos, self.indices[aristas], llegan)
+            nuevos &= ~activos
+            activos |= nuevos
+            frontera = np.flatnonzero(nuevos.any(axis=1))
+        return activos
+
+    def sigma(self, semillas):
+        return AnalizadorCELF._popcount(self._alcanzar(semillas, np.zeros_like(self.alcanzados))) / self.R
+
+    def ganancia(self, u):
+        self.evaluaciones += 1
+        return (AnalizadorCELF._popcount(self._alcanzar(u)) - self._n_alcanzados) / self.R
+
+    def ganancias(self, u, extra=None):
+        # CELF++ con un solo recorrido desde u: en cada mundo lo alcanzado por S + extra + u es la union
+        # de lo alcanzado por S + u y por S + extra. Se guarda el alcance del mejor nodo evaluado en la
+        # ronda, que es el 'extra' de las evaluaciones siguientes y el que agregar() suele recibir.
+        self.evaluaciones += 1
+        alcance = self._alcanzar(u)
+        n_alcance = AnalizadorCELF._popcount(alcance)
+        mg1 = (n_alcance - self._n_alcanzados) / self.R
+        mg2 = mg1
+        if extra is not None:
+            if extra not in self._con_extra:
+                # extra tomo su ganancia de mg2 sin reevaluarse en esta ronda.
+                self.evaluaciones += 1
+                base = self._alcanzar(extra)
+                self._con_extra[extra] = (base, AnalizadorCELF._popcount(base))
+            base, n_base = self._con_extra[extra]
+            mg2 = (AnalizadorCELF._popcount(alcance | base) - n_base) / self.R
+        if self._mejor is None or mg1 > self._mejor[1]:
+            if self._mejor is not None and self._mejor[0] != extra:
+                self._con_extra.pop(self._mejor[0], None)
+            self._mejor = (u, mg1)
+            self._con_extra[u] = (alcance, n_alcance)
+        return mg1, mg2
 
-        return S, SPREAD, timelapse, LOOKUPS
\ No newline at end of file
+    def agregar(self, u, ganancia=None):
+        self.alcanzados = self._con_extra[u][0] if u in self._con_extra else self._alcanzar(u)
+        self._con_extra, self._mejor = {}, None
+        self._n_alcanzados = AnalizadorCELF._popcount(self.alcanzados)
+        self.S.append(u)
+        self.spread = self._n_alcanzados / self.R
@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+class CacheDifusion:
+    # Memoriza el 'record' de picos y las metricas de una difusion por (huella del grafo, semillas,
+    # tasa, iteraciones, masa_total). LRU en memoria y, si se da 'carpeta', un .npz por clave en disco.
+    # VERSION entra en la clave: cambia cuando cambia el formato del record (2: denso, orden de nodos).
+    VERSION = 2
+
+    def __init__(self, capacidad=256, carpeta=None):
+        self.capacidad = capacidad
+        self.carpeta = carpeta
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @staticmethod
+    def clave(huella_grafo, semillas, tasa, iteraciones, masa_total):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"v{CacheDifusion.VERSION}".encode())
+        h.update(huella_grafo.encode())
+        h.update(repr(sorted(semillas)).encode())
+        h.update(repr((float(tasa), int(iteraciones), float(masa_total))).encode())
+        return h.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta, f"{clave}.npz")
+
+    def obtener(self, clave):
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return self._entradas[clave]
+
+        if self.carpeta and os.path.exists(self._ruta(clave)):
+            with np.load(self._ruta(clave)) as datos:
+                entrada = (datos['record'], json.loads(str(datos['metricas'])))
+            self._recordar(clave, entrada)
+            self.aciertos += 1
+            return entrada
+
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, record, metricas):
+        entrada = (np.asarray(record), dict(metricas))
+        self._recordar(clave, entrada)
+        if self.carpeta:
+            # Escritura atomica: varios procesos pueden compartir la misma carpeta.
+            temporal = self._ruta(clave) + f".{os.getpid()}.tmp"
+            with open(temporal, 'wb') as f:
+                np.savez(f, record=entrada[0], metricas=json.dumps(entrada[1]))
+            os.replace(temporal, self._ruta(clave))
+        return entrada
+
+    def _recordar(self, clave, entrada):
+        self._entradas[clave] = entrada
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        self._entradas.clear()
+        self.aciertos = 0
+        self.fallos = 0
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+from .grafo_csr import GrafoCSR
+
+
+class CargadorAristas:
+    # Listas de aristas al estilo SNAP ("u v [peso]" por linea, '#' para comentarios, .gz opcional)
+    # directo a GrafoCSR: se leen por bloques con el parser en C de pandas, las etiquetas se
+    # remapean a indices densos con np.unique y nunca se construye un grafo de networkx.
+    FILAS_POR_BLOQUE = 5_000_000
+
+    @staticmethod
+    def _leer_bloques(ruta, separador, comentario, columnas, tipo_ids, filas_por_bloque):
+        import pandas as pd
+        tipos = {columnas[0]: tipo_ids, columnas[1]: tipo_ids}
+        if len(columnas) > 2:
+            tipos[columnas[2]] = np.float64
+        lector = pd.read_csv(
+            ruta, sep=separador, comment=comentario, header=None, usecols=list(columnas), dtype=tipos,
+            chunksize=filas_por_bloque, compression='infer', engine='c'
+        )
+        origen, destino, pesos = [], [], []
+        with lector:
+            for bloque in lector:
+                origen.append(bloque[columnas[0]].to_numpy())
+                destino.append(bloque[columnas[1]].to_numpy())
+                if len(columnas) > 2:
+                    pesos.append(bloque[columnas[2]].to_numpy())
+        vacio = np.empty(0, dtype=tipo_ids)
+        return (np.concatenate(origen) if origen else vacio,
+                np.concatenate(destino) if destino else vacio,
+                np.concatenate(pesos) if pesos else None)
+
+    @staticmethod
+    def _remapear(etiquetas):
+        # Etiquetas -> indices densos 0..n-1 en orden creciente de etiqueta. Con ids enteros no negativos
+        # y no mucho mayores que la cantidad de etiquetas (caso comun en SNAP) se evita ordenar.
+        if etiquetas.dtype.kind in 'iu' and len(etiquetas) > 0:
+            minimo, maximo = int(etiquetas.min()), int(etiquetas.max())
+            if minimo >= 0 and maximo < 4 * len(etiquetas):
+                presentes = np.zeros(maximo + 1, dtype=bool)
+                presentes[etiquetas] = True
+                ids = np.flatnonzero(presentes)
+                mapa = np.cumsum(presentes) - 1
+                return ids.astype(etiquetas.dtype), mapa[etiquetas]
+        ids, codigos = np.unique(etiquetas, return_inverse=True)
+        return ids, codigos.ravel()
+
+    @staticmethod
+    def leer(ruta, dirigido=True, ponderado=False, separador=r"\s+", comentario="#", columnas=None,
+             quitar_duplicados=True, quitar_lazos=True, filas_por_bloque=None):
+        columnas = tuple(columnas) if columnas is not None else ((0, 1, 2) if ponderado else (0, 1))
+        filas_por_bloque = filas_por_bloque or CargadorAristas.FILAS_POR_BLOQUE
+        # Etiquetas enteras (lo habitual en SNAP) se leen como int64; si no lo son, como texto.
+        try:
+            etiquetas_u, etiquetas_v, pesos = CargadorAristas._leer_bloques(
+                ruta, separador, comentario, columnas, np.int64, filas_por_bloque)
+        except (ValueError, OverflowError):
+            etiquetas_u, etiquetas_v, pesos = CargadorAristas._leer_bloques(
+                ruta, separador, comentario, columnas, str, filas_por_bloque)
+
+        m = len(etiquetas_u)
+        ids, codigos = CargadorAristas._remapear(np.concatenate([etiquetas_u, etiquetas_v]))
+        del etiquetas_u, etiquetas_v
+        origen, destino = codigos[:m], codigos[m:]
+        n = len(ids)
+
+        if quitar_lazos:
+            distintos = origen != destino
+            origen, destino = origen[distintos], destino[distintos]
+            pesos = None if pesos is None else pesos[distintos]
+        if quitar_duplicados:
+            # En un grafo no dirigido (u, v) y (v, u) son la misma arista. Se conserva la primera aparicion.
+            if not dirigido:
+                origen, destino = np.minimum(origen, destino), np.maximum(origen, destino)
+            if pesos is None:
+                # Sin pesos basta con ordenar las claves (el CSR hacia adelante ya sale ordenado).
+                # sort + mascara en lugar de np.unique, que en numpy reciente pasa por una tabla hash.
+                clave = origen * n + destino
+                clave.sort()
+                clave = clave[np.concatenate(([True], clave[1:] != clave[:-1]))]
+                origen, destino = np.divmod(clave, n)
+            else:
+                _, primeras = np.unique(origen * n + destino, return_index=True)
+                origen, destino, pesos = origen[primeras], destino[primeras], pesos[primeras]
+
+        ids = ids if ids.dtype.kind in 'iu' else GrafoCSR._ids_compactos(ids.tolist())
+        return GrafoCSR.desde_aristas(origen, destino, n, ids=ids, valores={'val': np.ones(n)}, pesos=pesos,
+                                      dirigido=dirigido)
+
+    @staticmethod
+    def cargar(ruta, instantanea=True, **opciones):
+        # La primera lectura guarda una instantanea (por defecto '<ruta>.grafo') y las siguientes la abren
+        # con mmap. Se regenera si el archivo cambio (tamano o fecha) o si cambian las opciones de lectura.
+        if instantanea is True:
+            instantanea = f"{ruta}.grafo"
+        if not instantanea:
+            return CargadorAristas.leer(ruta, **opciones)
+
+        estado = os.stat(ruta)
+        metadatos = {
+            'origen': os.path.abspath(ruta),
+            'tamano': estado.st_size,
+            'modificado': estado.st_mtime_ns,
+            'opciones': {clave: list(v) if isinstance(v, tuple) else v for clave, v in sorted(opciones.items())
+                         if clave != 'filas_por_bloque'}
+        }
+        if GrafoCSR.es_instantanea(instantanea) and GrafoCSR.leer_metadatos(instantanea) == metadatos:
+            return GrafoCSR.cargar(instantanea)
+        G = CargadorAristas.leer(ruta, **opciones)
+        G.guardar(instantanea, metadatos)
+        return GrafoCSR.cargar(instantanea)
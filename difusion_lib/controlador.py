@@ -1,17 +1,22 @@
 import os
-import networkx as nx
-import pandas as pd
+import numpy as np
 from .motor_difusion import MotorDifusion
+from .grafo_csr import GrafoCSR
 from .analitica import AnalizadorPelado
 from .visualizador import VisualizadorPelado
 
 class ControladorPelado:
     def __init__(self, grafo):
+        # Acepta tambien la carpeta de una instantanea (GrafoCSR.guardar); se abre con mmap.
+        if isinstance(grafo, (str, os.PathLike)):
+            grafo = GrafoCSR.cargar(grafo)
         self.G = grafo.copy()
         self.nodos_originales = list(self.G.nodes()) 
         self.conteo_nodos_original = len(self.nodos_originales)
         self.registro_maestro = [] 
         self.ruta_raiz = None 
+        # Etiquetas del ultimo record de ejecutar_estudio: record[i] es el pico del nodo nodos_record[i].
+        self.nodos_record = None
 
     def _preparar_carpetas(self, ruta_destino):
         self.ruta_raiz = ruta_destino
@@ -26,8 +31,24 @@ class ControladorPelado:
                                   carpeta_exportacion="simulaciones/ejecucion",
                                   nombre_resumen="reporte_resumen_pelado.csv",
                                   generar_visualizaciones=False,
-                                  usar_cfc=False):  
+                                  usar_cfc=False,
+                                  tolerancia=None,
+                                  estado_estacionario=False,
+                                  backend="networkx"):  
         
+        # Un GrafoCSR es inmutable: siempre se pela con la mascara de nodos vivos.
+        if backend == "arreglos" or isinstance(self.G, GrafoCSR):
+            return self._ejecutar_pelado_arreglos(
+                num_pelados=num_pelados, iteraciones_por_pelado=iteraciones_por_pelado, umbral_masa=umbral_masa,
+                umbral_nodos_final=umbral_nodos_final, tasa_difusion=tasa_difusion, valor_inicio=valor_inicio,
+                mostrar_graficos=mostrar_graficos, exportar_resultados=exportar_resultados,
+                carpeta_exportacion=carpeta_exportacion, nombre_resumen=nombre_resumen,
+                generar_visualizaciones=generar_visualizaciones, usar_cfc=usar_cfc,
+                tolerancia=tolerancia, estado_estacionario=estado_estacionario
+            )
+        if backend != "networkx":
+            raise ValueError(f"Backend de pelado desconocido: {backend}")
+
         if exportar_resultados: self._preparar_carpetas(carpeta_exportacion)
         ruta_datos = os.path.join(self.ruta_raiz, "reportes_datos") if self.ruta_raiz else ""
 
@@ -36,6 +57,7 @@ class ControladorPelado:
         
         print(f"Iniciando Estudio: {self.conteo_nodos_original} nodos.")
         pelados = {} 
+        motor = MotorDifusion(self.G, tasa_difusion=tasa_difusion)
         
         for p in range(num_pelados):
             if len(self.G.nodes()) == 0: break
@@ -43,8 +65,10 @@ class ControladorPelado:
             for n in self.G.nodes():
                 self.G.nodes[n]['val'] = valor_inicio.get(n, 1.0) if isinstance(valor_inicio, dict) else float(valor_inicio)
             
-            motor = MotorDifusion(self.G, tasa_difusion=tasa_difusion)
-            motor.ejecutar(iteraciones=iteraciones_por_pelado)
+            if estado_estacionario:
+                motor.ejecutar_estacionario()
+            else:
+                motor.ejecutar(iteraciones=iteraciones_por_pelado, tolerancia=tolerancia)
             
             if generar_visualizaciones:
                 titulo_p = f"Capa {p+1}"
@@ -57,11 +81,15 @@ class ControladorPelado:
                     VisualizadorPelado.renderizar(self.G, f"Post-Difusion_P{p+1}", self.ruta_raiz, mostrar_grafico=mostrar_graficos)
 
             if exportar_resultados:
+                import pandas as pd
                 datos_post = [{"nodo": n, "masa": self.G.nodes[n]['val']} for n in self.G.nodes()]
                 pd.DataFrame(datos_post).to_csv(os.path.join(ruta_datos, f"masa_P{p+1}.csv"), index=False)
             
             if usar_cfc:
-                para_quitar = AnalizadorPelado.obtener_metricas_cfc(self.G, p, self.conteo_nodos_original)
+                masas = np.array([self.G.nodes[n]['val'] for n in motor._nodes])
+                para_quitar = AnalizadorPelado.obtener_metricas_cfc_csr(
+                    motor._A, masas, motor._nodes, p, self.conteo_nodos_original, umbral_masa=umbral_masa
+                )
             else:
                 para_quitar = AnalizadorPelado.nodos_para_quitar(self.G, p, self.conteo_nodos_original, umbral_masa=umbral_masa)
             
@@ -104,7 +132,7 @@ class ControladorPelado:
                 cfc['umbral_utilizado'] = umbral_masa
                 self.registro_maestro.append(cfc)
                 nodos_eliminados_esta_capa.extend(cfc['nodos'])
-                self.G.remove_nodes_from(cfc['nodos'])
+            motor.eliminar_nodos(nodos_eliminados_esta_capa)
 
             if len(self.G.nodes) <= umbral_nodos_final:
                 break
@@ -125,11 +153,133 @@ class ControladorPelado:
         
         return self.registro_maestro, figuras_interactivas, self.G, pelados
     
+    def _ejecutar_pelado_arreglos(self, num_pelados, iteraciones_por_pelado, umbral_masa, umbral_nodos_final,
+                                  tasa_difusion, valor_inicio, mostrar_graficos, exportar_resultados,
+                                  carpeta_exportacion, nombre_resumen, generar_visualizaciones, usar_cfc,
+                                  tolerancia, estado_estacionario):
+        # Mismo estudio que el backend de networkx, pero el grafo vive como CSR dentro del motor y
+        # cada capa solo apaga nodos en una mascara; networkx se toca una vez al final.
+        if exportar_resultados: self._preparar_carpetas(carpeta_exportacion)
+        ruta_datos = os.path.join(self.ruta_raiz, "reportes_datos") if self.ruta_raiz else ""
+
+        figuras_interactivas = []
+        titulos_interactivos = []
+
+        print(f"Iniciando Estudio: {self.conteo_nodos_original} nodos.")
+        pelados = {}
+        motor = MotorDifusion(self.G, tasa_difusion=tasa_difusion)
+        nodos = motor._nodes
+        vivos = np.ones(len(nodos), dtype=bool)
+        if isinstance(valor_inicio, dict):
+            v_inicial = np.array([valor_inicio.get(n, 1.0) for n in nodos], dtype=float)
+        else:
+            v_inicial = np.full(len(nodos), float(valor_inicio))
+        v = np.zeros(len(nodos))
+
+        for p in range(num_pelados):
+            if not vivos.any(): break
+
+            motor.aplicar_mascara(vivos)
+            v = np.where(vivos, v_inicial, 0.0)
+            if estado_estacionario:
+                v = motor.estado_estacionario(v)
+            else:
+                v = motor.propagar(v, iteraciones=iteraciones_por_pelado, tolerancia=tolerancia)
+
+            if generar_visualizaciones:
+                G_capa = self._subgrafo_con_masas(nodos, vivos, v)
+                titulo_p = f"Capa {p+1}"
+                fig_p = VisualizadorPelado.generar_figura_3d(G_capa, titulo_p)
+                if fig_p:
+                    figuras_interactivas.append(fig_p)
+                    titulos_interactivos.append(titulo_p)
+
+                if exportar_resultados:
+                    VisualizadorPelado.renderizar(G_capa, f"Post-Difusion_P{p+1}", self.ruta_raiz, mostrar_grafico=mostrar_graficos)
+
+            if exportar_resultados:
+                import pandas as pd
+                idx_vivos = np.flatnonzero(vivos)
+                datos_post = pd.DataFrame({"nodo": [nodos[i] for i in idx_vivos], "masa": v[idx_vivos]})
+                datos_post.to_csv(os.path.join(ruta_datos, f"masa_P{p+1}.csv"), index=False)
+
+            if usar_cfc:
+                a_eliminar = AnalizadorPelado.obtener_metricas_cfc_csr(
+                    motor._A, v, nodos, p, self.conteo_nodos_original, umbral_masa=umbral_masa, vivos=vivos
+                )
+            else:
+                candidatos = np.flatnonzero(vivos & (v >= umbral_masa))
+                a_eliminar = candidatos[np.argsort(-v[candidatos], kind='stable')]
+
+            if len(a_eliminar) == 0:
+                print(f"Pelado {p+1}: Fin (Umbral no alcanzado).")
+                break
+
+            max_eliminaciones = int(vivos.sum()) - umbral_nodos_final
+
+            if len(a_eliminar) > max_eliminaciones:
+                a_eliminar = a_eliminar[:max_eliminaciones]
+
+            nodos_eliminados_esta_capa = []
+            if usar_cfc:
+                for cfc in a_eliminar:
+                    cfc['umbral_utilizado'] = umbral_masa
+                    self.registro_maestro.append(cfc)
+                    nodos_eliminados_esta_capa.extend(cfc['nodos'])
+                indice = motor._indice
+                vivos[[indice[n] for n in nodos_eliminados_esta_capa]] = False
+            else:
+                for i in a_eliminar:
+                    self.registro_maestro.append({
+                        'capa_pelado': p + 1,
+                        'id_componente': f"P{p+1}_N{nodos[i]}",
+                        'nodos': [nodos[i]],
+                        'masa_total': v[i],
+                        'umbral_utilizado': umbral_masa
+                    })
+                    nodos_eliminados_esta_capa.append(nodos[i])
+                vivos[a_eliminar] = False
+
+            if vivos.sum() <= umbral_nodos_final:
+                break
+
+            pelados[p+1] = nodos_eliminados_esta_capa
+
+        if isinstance(self.G, GrafoCSR):
+            self.G = self.G.subgrafo(vivos, valores={'val': v[vivos]})
+        else:
+            self.G.remove_nodes_from([nodos[i] for i in np.flatnonzero(~vivos)])
+            for i in np.flatnonzero(vivos):
+                self.G.nodes[nodos[i]]['val'] = v[i]
+
+        if exportar_resultados:
+            if generar_visualizaciones and figuras_interactivas:
+                VisualizadorPelado.exportar_dashboard_interactivo(
+                    figuras_interactivas,
+                    titulos_interactivos,
+                    self.ruta_raiz
+                )
+            self.exportar_resumen(nombre_resumen)
+
+        print(f"Ammount of survivors {len(self.G.nodes())}")
+
+        return self.registro_maestro, figuras_interactivas, self.G, pelados
+
+    def _subgrafo_con_masas(self, nodos, vivos, v):
+        if isinstance(self.G, GrafoCSR):
+            return self.G.subgrafo(vivos, valores={'val': v[vivos]}).a_networkx()
+        G_capa = self.G.copy()
+        G_capa.remove_nodes_from([nodos[i] for i in np.flatnonzero(~vivos)])
+        for i in np.flatnonzero(vivos):
+            G_capa.nodes[nodos[i]]['val'] = v[i]
+        return G_capa
+    
     def ejecutar_estudio(self, iteraciones=150, nodos=[], tasa_difusion=0.7, valor_inicio=1.0, 
                                   mostrar_graficos=False, exportar_resultados=False, 
                                   carpeta_exportacion="simulaciones/ejecucion",
                                   nombre_resumen="reporte_resumen_pelado.csv",
-                                  generar_visualizaciones=False):  
+                                  generar_visualizaciones=False,
+                                  tolerancia=None):  
         
         if exportar_resultados: self._preparar_carpetas(carpeta_exportacion)
         ruta_datos = os.path.join(self.ruta_raiz, "reportes_datos") if self.ruta_raiz else ""
@@ -142,35 +292,42 @@ class ControladorPelado:
         if len(self.G.nodes()) == 0: 
             return 'Por favor especifica los nodos iniciales.'
             
-        for n in self.G.nodes:
-            if n in nodos:
-                self.G.nodes[n]['val'] = valor_inicio.get(n, 1.0) if isinstance(valor_inicio, dict) else float(valor_inicio)
-            else: 
-                self.G.nodes[n]['val'] = 0
-        
-        motor = MotorDifusion(self.G, tasa_difusion=tasa_difusion)
-        
-        max_node_id = max(self.nodos_originales) if self.nodos_originales else 0
-        record = [0] * (max_node_id + 1)
-        for i in range(iteraciones):
-            motor.ejecutar(iteraciones=1)
+        if isinstance(self.G, GrafoCSR):
+            motor = MotorDifusion(self.G, tasa_difusion=tasa_difusion)
+            semillas = set(nodos)
+            motor.valores = np.array([
+                (valor_inicio.get(n, 1.0) if isinstance(valor_inicio, dict) else float(valor_inicio)) if n in semillas else 0.0
+                for n in motor._nodes
+            ])
+        else:
             for n in self.G.nodes:
-                if self.G.nodes[n]['val'] > record[n]:
-                    record[n] = self.G.nodes[n]['val']
+                if n in nodos:
+                    self.G.nodes[n]['val'] = valor_inicio.get(n, 1.0) if isinstance(valor_inicio, dict) else float(valor_inicio)
+                else: 
+                    self.G.nodes[n]['val'] = 0
+            
+            motor = MotorDifusion(self.G, tasa_difusion=tasa_difusion)
+        
+        # record es denso, en el orden de motor._nodes: no depende de que las etiquetas sean enteros
+        # pequenos. Solo se traduce a etiquetas al exportar.
+        record, _ = motor.ejecutar_con_picos(iteraciones=iteraciones, tolerancia=tolerancia)
+        self.nodos_record = motor._nodes
                     
         if generar_visualizaciones:
+            G_vis = self.G
+            if isinstance(self.G, GrafoCSR):
+                G_vis = self.G.con_valores({'val': motor.valores.copy()}).a_networkx()
             titulo_p = f"Difusion Final"
-            fig_p = VisualizadorPelado.generar_figura_3d(self.G, titulo_p)
+            fig_p = VisualizadorPelado.generar_figura_3d(G_vis, titulo_p)
             if fig_p:
                 figuras_interactivas.append(fig_p)
                 titulos_interactivos.append(titulo_p)
 
             if exportar_resultados:
-                VisualizadorPelado.renderizar(self.G, f"Post-Difusion_Final", self.ruta_raiz, mostrar_grafico=mostrar_graficos)
+                VisualizadorPelado.renderizar(G_vis, f"Post-Difusion_Final", self.ruta_raiz, mostrar_grafico=mostrar_graficos)
 
         if exportar_resultados:
-            datos_post = [{"nodo": n, "masa": record[n]} for n in self.G.nodes()]
-            pd.DataFrame(datos_post).to_csv(os.path.join(ruta_datos, f"Masa_Final.csv"), index=False)       
+            self.exportar_masa_final(record)
         
         if exportar_resultados:
             if generar_visualizaciones and figuras_interactivas:
@@ -183,8 +340,24 @@ class ControladorPelado:
 
         return self.registro_maestro, figuras_interactivas, record
 
+    def _etiquetas_record(self, record):
+        # Un record recibido de otro controlador (p. ej. desde la cache) cubre el grafo completo, en el orden
+        # original de sus nodos: self.G puede haber quedado con solo los sobrevivientes de un pelado.
+        nodos = self.nodos_record if self.nodos_record is not None else self.nodos_originales
+        if len(nodos) != len(record):
+            raise ValueError(f"El record tiene {len(record)} entradas y el grafo {len(nodos)} nodos")
+        return nodos
+
+    def exportar_masa_final(self, record, carpeta_exportacion=None):
+        if carpeta_exportacion is not None: self._preparar_carpetas(carpeta_exportacion)
+        if not self.ruta_raiz: return
+        import pandas as pd
+        datos_post = {"nodo": self._etiquetas_record(record), "masa": np.asarray(record)}
+        pd.DataFrame(datos_post).to_csv(os.path.join(self.ruta_raiz, "reportes_datos", f"Masa_Final.csv"), index=False)
+
     def exportar_resumen(self, nombre_archivo):
         if not self.ruta_raiz or not self.registro_maestro: return
+        import pandas as pd
         df = pd.DataFrame(self.registro_maestro)
         df.to_csv(os.path.join(self.ruta_raiz, nombre_archivo), index=False)
 
@@ -196,10 +369,11 @@ class ControladorPelado:
             for nodo in lista_nodos:
                 nodo_a_capa[nodo] = capa
         
+        masa_de = dict(zip(self._etiquetas_record(record_masas), np.asarray(record_masas).tolist()))
         consolidado = []
         
         for n in self.nodos_originales:
-            masa_val = record_masas[n] if n < len(record_masas) else 0
+            masa_val = masa_de.get(n, 0)
             
             capa_val = nodo_a_capa.get(n, -1) 
 
@@ -209,6 +383,7 @@ class ControladorPelado:
                 "record[n]": masa_val
             })
             
+        import pandas as pd
         path_final = os.path.join(self.ruta_raiz, nombre_archivo)
         pd.DataFrame(consolidado).to_csv(path_final, index=False)
         print(f"Reporte consolidado generado en: {path_final}")
\ No newline at end of file
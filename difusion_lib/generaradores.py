@@ -1,6 +1,8 @@
+import json
 import networkx as nx
 import numpy as np
 import random
+from .grafo_csr import GrafoCSR
 
 class GeneradorRedes:
     @staticmethod
@@ -122,4 +124,216 @@ class GeneradorRedes:
                 out_edges = list(G.out_edges(n))
                 G.remove_edges_from(out_edges)
             
-        return G
\ No newline at end of file
+        return G
+
+    # Versiones vectorizadas: generan las aristas en bloque con numpy a partir de una semilla
+    # explicita y devuelven un GrafoCSR listo para el motor, el pelado, CELF y RIS.
+
+    @staticmethod
+    def _instantanea(ruta, generador, **parametros):
+        # Con 'instantanea' el grafo se genera una sola vez: si la carpeta ya existe se abre (mmap) y se
+        # reutiliza; si no, se genera y se guarda ahi junto con el generador y sus parametros.
+        metadatos = {'generador': generador.__name__, 'parametros': parametros}
+        if GrafoCSR.es_instantanea(ruta):
+            G, previos = GrafoCSR.cargar(ruta, devolver_metadatos=True)
+            if json.loads(json.dumps(metadatos, default=str)) != previos:
+                raise ValueError(f"La instantanea '{ruta}' fue generada con {previos}, no con {metadatos}")
+            return G
+        G = generador(**parametros)
+        G.guardar(ruta, metadatos)
+        return GrafoCSR.cargar(ruta)
+
+    @staticmethod
+    def _claves_unicas(clave):
+        # sort + mascara en lugar de np.unique, que en numpy reciente pasa por una tabla hash.
+        clave = np.sort(clave)
+        distinta = np.ones(len(clave), dtype=bool)
+        distinta[1:] = clave[1:] != clave[:-1]
+        return clave[distinta]
+
+    @staticmethod
+    def _sin_duplicados(origen, destino, n):
+        clave = GeneradorRedes._claves_unicas(origen.astype(np.int64) * n + destino)
+        return clave // n, clave % n
+
+    @staticmethod
+    def _aristas_preferenciales(n, m, rng):
+        # Barabasi-Albert por el metodo de Batagelj y Brandes: la arista k sale del nodo k // m y su otro
+        # extremo copia una posicion uniforme de la lista de extremos ya escrita (0..2k), lo que equivale a
+        # elegir un nodo con probabilidad proporcional a su grado. Las copias de copias se resuelven con
+        # saltos vectorizados; cada salto va a una posicion anterior, asi que la cadena termina.
+        k = np.arange(n * m, dtype=np.int64)
+        r = rng.integers(0, 2 * k + 1)
+        posicion = r.copy()
+        pendientes = np.flatnonzero(posicion & 1)
+        while len(pendientes):
+            posicion[pendientes] = r[posicion[pendientes] >> 1]
+            pendientes = pendientes[(posicion[pendientes] & 1) == 1]
+        # Devuelve (nodo nuevo, nodo elegido), con elegido <= nuevo; puede haber lazos y repetidas.
+        return k // m, (posicion >> 1) // m
+
+    @staticmethod
+    def _aristas_holme_kim(n, m, p_triangle, rng):
+        # Aproximacion vectorizada de powerlaw_cluster_graph (Holme-Kim): sobre la base preferencial, cada
+        # arista que no es la primera de su nodo pasa con probabilidad p_triangle a un vecino (mas viejo
+        # que el nodo nuevo) del extremo de la arista anterior, cerrando un triangulo. Los vecinos se
+        # toman del grafo base completo, no del grafo parcial al momento de agregar el nodo.
+        nuevo, elegido = GeneradorRedes._aristas_preferenciales(n, m, rng)
+        sin_lazo = nuevo != elegido
+        clave = GeneradorRedes._claves_unicas(
+            np.concatenate([elegido[sin_lazo] * n + nuevo[sin_lazo], nuevo[sin_lazo] * n + elegido[sin_lazo]])
+        )
+
+        anterior = np.flatnonzero((np.arange(len(nuevo)) % m != 0) & (rng.random(len(nuevo)) < p_triangle))
+        w, fuente = elegido[anterior - 1], nuevo[anterior]
+        desde = np.searchsorted(clave, w * n)
+        cantidad = np.searchsorted(clave, w * n + fuente) - desde
+        con_vecino = cantidad > 0
+        elegido = elegido.copy()
+        elegido[anterior[con_vecino]] = clave[desde[con_vecino] + (rng.random(con_vecino.sum()) * cantidad[con_vecino]).astype(np.int64)] % n
+
+        sin_lazo = nuevo != elegido
+        return GeneradorRedes._sin_duplicados(elegido[sin_lazo], nuevo[sin_lazo], n)
+
+    @staticmethod
+    def generar_malla_estocastica_netlogo_csr(dim=3, link_chance=40, semilla=None, instantanea=None):
+        if instantanea is not None:
+            return GeneradorRedes._instantanea(
+                instantanea, GeneradorRedes.generar_malla_estocastica_netlogo_csr,
+                dim=dim, link_chance=link_chance, semilla=semilla
+            )
+        rng = np.random.default_rng(semilla)
+        n = dim * dim
+        fila, col = np.divmod(np.arange(n, dtype=np.int64), dim)
+        # Vecinos en orden creciente de indice (arriba, izquierda, derecha, abajo): el CSR sale ordenado.
+        desplazamientos = np.array([-dim, -1, 1, dim])
+        validos = np.stack([fila > 0, col > 0, col < dim - 1, fila < dim - 1], axis=1)
+        validos &= rng.random((n, 4)) * 100 < link_chance
+        origen = np.repeat(np.arange(n, dtype=np.int64), 4).reshape(n, 4)
+        destino = origen + desplazamientos
+        return GrafoCSR.desde_aristas(origen[validos], destino[validos], n, valores={'val': np.ones(n)})
+
+    @staticmethod
+    def generar_cascada_estricta_csr(n_bloques=100, nodos_por_bloque=4, semilla=None, instantanea=None):
+        if instantanea is not None:
+            return GeneradorRedes._instantanea(
+                instantanea, GeneradorRedes.generar_cascada_estricta_csr, n_bloques=n_bloques, nodos_por_bloque=nodos_por_bloque, semilla=semilla
+            )
+        rng = np.random.default_rng(semilla)
+        n = n_bloques * nodos_por_bloque
+        inicio = np.arange(n_bloques, dtype=np.int64) * nodos_por_bloque
+
+        nodos = np.arange(n, dtype=np.int64)
+        anillo_u, anillo_v = nodos, inicio.repeat(nodos_por_bloque) + (nodos + 1) % nodos_por_bloque
+
+        azar = nodos_por_bloque * 2
+        internos_u = inicio.repeat(azar) + rng.integers(0, nodos_por_bloque, n_bloques * azar)
+        internos_v = inicio.repeat(azar) + rng.integers(0, nodos_por_bloque, n_bloques * azar)
+        distintos = internos_u != internos_v
+
+        puentes = inicio[:-1].repeat(5)
+        puentes_u = puentes + rng.integers(0, nodos_por_bloque, len(puentes))
+        puentes_v = puentes + nodos_por_bloque + rng.integers(0, nodos_por_bloque, len(puentes))
+
+        origen, destino = GeneradorRedes._sin_duplicados(
+            np.concatenate([anillo_u, internos_u[distintos], puentes_u]),
+            np.concatenate([anillo_v, internos_v[distintos], puentes_v]), n
+        )
+        return GrafoCSR.desde_aristas(origen, destino, n, valores={'val': np.ones(n)})
+
+    @staticmethod
+    def generar_flujo_libre_escala_csr(n_nodos=1000, semilla=None, instantanea=None):
+        if instantanea is not None:
+            return GeneradorRedes._instantanea(
+                instantanea, GeneradorRedes.generar_flujo_libre_escala_csr, n_nodos=n_nodos, semilla=semilla
+            )
+        # Base Barabasi-Albert (m=2) generada con numpy, orientada del nodo mas viejo al mas nuevo.
+        rng = np.random.default_rng(semilla)
+        nuevo, elegido = GeneradorRedes._aristas_preferenciales(n_nodos, 2, rng)
+        sin_lazo = nuevo != elegido
+        split_point = min(50, n_nodos // 2)
+        atajos_u = rng.integers(split_point, n_nodos, 20)
+        atajos_v = rng.integers(0, split_point, 20)
+        origen, destino = GeneradorRedes._sin_duplicados(
+            np.concatenate([elegido[sin_lazo], atajos_u]),
+            np.concatenate([nuevo[sin_lazo], atajos_v]), n_nodos
+        )
+        return GrafoCSR.desde_aristas(origen, destino, n_nodos, valores={'val': np.ones(n_nodos)})
+
+    @staticmethod
+    def generar_sbm_estocastico_csr(n_total=300, n_grupos=10, semilla=None, p_intra=0.02, p_siguiente=0.01, p_fondo=0.001, instantanea=None):
+        if instantanea is not None:
+            return GeneradorRedes._instantanea(
+                instantanea, GeneradorRedes.generar_sbm_estocastico_csr, n_total=n_total, n_grupos=n_grupos,
+                semilla=semilla, p_intra=p_intra, p_siguiente=p_siguiente, p_fondo=p_fondo
+            )
+        # Mismas probabilidades por clase de bloque que la version de networkx (intra, bloque siguiente,
+        # fondo), pero sin recorrer los n_grupos^2 pares: cada clase sortea su numero de aristas con una
+        # binomial y las ubica con enteros uniformes; los duplicados (raros en grafos dispersos) se descartan.
+        rng = np.random.default_rng(semilla)
+        tamanos = rng.multinomial(n_total, [1/n_grupos]*n_grupos).astype(np.int64)
+        inicio = np.concatenate(([0], np.cumsum(tamanos)))[:-1]
+
+        conteo_intra = rng.binomial(tamanos * np.maximum(tamanos - 1, 0), p_intra)
+        b = np.repeat(np.arange(n_grupos), conteo_intra)
+        u_intra = rng.integers(0, tamanos[b]) if len(b) else b
+        v_intra = rng.integers(0, tamanos[b] - 1) if len(b) else b
+        v_intra = v_intra + (v_intra >= u_intra)
+
+        conteo_sig = rng.binomial(tamanos[:-1] * tamanos[1:], p_siguiente)
+        c = np.repeat(np.arange(n_grupos - 1), conteo_sig)
+        u_sig = inicio[c] + (rng.integers(0, tamanos[c]) if len(c) else c)
+        v_sig = inicio[c + 1] + (rng.integers(0, tamanos[c + 1]) if len(c) else c)
+
+        # Fondo: aristas uniformes sobre toda la matriz, quedandose con las que caen fuera de las otras clases.
+        n_fondo = rng.binomial(n_total * n_total, p_fondo)
+        u_fondo = rng.integers(0, n_total, n_fondo)
+        v_fondo = rng.integers(0, n_total, n_fondo)
+        grupo = np.repeat(np.arange(n_grupos), tamanos)
+        fuera = (grupo[v_fondo] != grupo[u_fondo]) & (grupo[v_fondo] != grupo[u_fondo] + 1)
+
+        origen, destino = GeneradorRedes._sin_duplicados(
+            np.concatenate([inicio[b] + u_intra, u_sig, u_fondo[fuera]]),
+            np.concatenate([inicio[b] + v_intra, v_sig, v_fondo[fuera]]), n_total
+        )
+        return GrafoCSR.desde_aristas(origen, destino, n_total, valores={'val': np.ones(n_total)})
+
+    @staticmethod
+    def generar_red_gaussiana_csr(n_nodos=200, radius=0.10, semilla=None, instantanea=None):
+        if instantanea is not None:
+            return GeneradorRedes._instantanea(
+                instantanea, GeneradorRedes.generar_red_gaussiana_csr, n_nodos=n_nodos, radius=radius, semilla=semilla
+            )
+        from scipy.spatial import cKDTree
+        rng = np.random.default_rng(semilla)
+        posiciones = rng.random((n_nodos, 2))
+        pares = cKDTree(posiciones).query_pairs(radius, output_type='ndarray').astype(np.int64)
+        invertir = rng.random(len(pares)) <= 0.5
+        origen = np.where(invertir, pares[:, 1], pares[:, 0])
+        destino = np.where(invertir, pares[:, 0], pares[:, 1])
+
+        # Como la version de networkx, solo quedan los nodos que tocan alguna arista.
+        ids, codigos = np.unique(np.concatenate([origen, destino]), return_inverse=True)
+        codigos = codigos.ravel()
+        pesos_gaussianos = np.clip(rng.normal(loc=1.0, scale=0.3, size=len(ids)), 0.1, None)
+        return GrafoCSR.desde_aristas(codigos[:len(origen)], codigos[len(origen):], len(ids), ids=ids,
+                                      valores={'val': pesos_gaussianos})
+
+    @staticmethod
+    def generar_red_social_realista_csr(n_users=300, m_neighbors=2, p_triangle=0.3, ratio_mutual=0.05, semilla=None, instantanea=None):
+        if instantanea is not None:
+            return GeneradorRedes._instantanea(
+                instantanea, GeneradorRedes.generar_red_social_realista_csr, n_users=n_users, m_neighbors=m_neighbors,
+                p_triangle=p_triangle, ratio_mutual=ratio_mutual, semilla=semilla
+            )
+        rng = np.random.default_rng(semilla)
+        u, v = GeneradorRedes._aristas_holme_kim(n_users, m_neighbors, p_triangle, rng)
+
+        mutua = rng.random(len(u)) < ratio_mutual
+        invertir = (rng.random(len(u)) >= 0.5) & ~mutua
+        origen = np.concatenate([np.where(invertir, v, u), v[mutua]])
+        destino = np.concatenate([np.where(invertir, u, v), u[mutua]])
+
+        mudos = rng.random(n_users) < 0.20
+        conservar = ~mudos[origen]
+        return GrafoCSR.desde_aristas(origen[conservar], destino[conservar], n_users)
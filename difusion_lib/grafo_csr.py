@@ -0,0 +1,292 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import numpy as np
+
+
+class GrafoCSR:
+    # Representacion compacta e inmutable compartida por motor, pelado, CELF y RIS.
+    # Adyacencia hacia adelante (indptr/indices) y hacia atras (indptr_inv/indices_inv) en int32,
+    # ids[i] es la etiqueta original del nodo i y 'valores' guarda arreglos por nodo (p. ej. 'val').
+    __slots__ = ('indptr', 'indices', 'indptr_inv', 'indices_inv', 'pesos', 'pesos_inv',
+                 'ids', 'valores', 'dirigido', '_indice', '_huella')
+
+    def __init__(self, indptr, indices, indptr_inv, indices_inv, ids=None, valores=None,
+                 pesos=None, pesos_inv=None, dirigido=True):
+        n = len(indptr) - 1
+        campos = {
+            'indptr': indptr, 'indices': indices, 'indptr_inv': indptr_inv, 'indices_inv': indices_inv,
+            'pesos': pesos, 'pesos_inv': pesos_inv,
+            'ids': np.arange(n) if ids is None else ids,
+            'valores': {clave: _solo_lectura(arreglo) for clave, arreglo in (valores or {}).items()},
+            'dirigido': dirigido,
+            '_indice': None,
+            '_huella': None
+        }
+        for nombre, valor in campos.items():
+            object.__setattr__(self, nombre, _solo_lectura(valor))
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("GrafoCSR es inmutable")
+
+    def __reduce__(self):
+        # __setattr__ bloqueado: se reconstruye por el constructor al cruzar procesos.
+        return (GrafoCSR, (self.indptr, self.indices, self.indptr_inv, self.indices_inv, self.ids, self.valores,
+                           self.pesos, self.pesos_inv, self.dirigido))
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __repr__(self):
+        return f"GrafoCSR(n_nodos={self.n_nodos}, n_aristas={self.n_aristas}, dirigido={self.dirigido})"
+
+    @property
+    def n_nodos(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_aristas(self):
+        return len(self.indices)
+
+    def nodes(self):
+        return self.ids.tolist() if isinstance(self.ids, np.ndarray) else list(self.ids)
+
+    def copy(self):
+        return self
+
+    def is_directed(self):
+        return self.dirigido
+
+    def indice(self, nodo):
+        if self._indice is None:
+            object.__setattr__(self, '_indice', {n: i for i, n in enumerate(self.ids)})
+        return self._indice[nodo]
+
+    def huella(self):
+        # Hash del contenido estructural (CSR, pesos, ids); se calcula una vez por grafo.
+        if self._huella is None:
+            h = hashlib.blake2b(digest_size=16)
+            for arreglo in (self.indptr, self.indices, self.pesos):
+                if arreglo is not None:
+                    h.update(np.ascontiguousarray(arreglo).tobytes())
+            h.update(np.asarray(self.ids).tobytes() if isinstance(self.ids, np.ndarray) else repr(self.ids).encode())
+            h.update(b'd' if self.dirigido else b'u')
+            object.__setattr__(self, '_huella', h.hexdigest())
+        return self._huella
+
+    def grados_salida(self):
+        return np.diff(self.indptr)
+
+    def grados_entrada(self):
+        return np.diff(self.indptr_inv)
+
+    def aristas(self):
+        origen = np.repeat(np.arange(self.n_nodos, dtype=self.indices.dtype), np.diff(self.indptr))
+        return origen, np.asarray(self.indices)
+
+    @staticmethod
+    def _tipo_indice(n):
+        return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+    @staticmethod
+    def _comprimir(fila, columna, n, pesos=None):
+        # CSR ordenado por (fila, columna): el orden de columnas dentro de cada fila es canonico.
+        # Si las aristas ya llegan ordenadas (generadores vectorizados) no se reordena nada.
+        clave = fila * n + columna
+        if np.any(clave[1:] < clave[:-1]):
+            orden = np.argsort(clave, kind='stable')
+            columna = columna[orden]
+            pesos = None if pesos is None else pesos[orden]
+        tipo = GrafoCSR._tipo_indice(max(n, len(fila)))
+        indptr = np.zeros(n + 1, dtype=tipo)
+        np.cumsum(np.bincount(fila, minlength=n), out=indptr[1:])
+        return indptr, columna.astype(tipo), pesos
+
+    @classmethod
+    def desde_aristas(cls, origen, destino, n_nodos=None, ids=None, valores=None, pesos=None, dirigido=True):
+        origen = np.asarray(origen, dtype=np.int64)
+        destino = np.asarray(destino, dtype=np.int64)
+        if n_nodos is None:
+            n_nodos = len(ids) if ids is not None else int(max(origen.max(initial=-1), destino.max(initial=-1)) + 1)
+        pesos = None if pesos is None else np.asarray(pesos)
+        if not dirigido:
+            # Cada arista no dirigida se guarda en ambos sentidos; los lazos una sola vez.
+            espejo = origen != destino
+            origen, destino = np.concatenate([origen, destino[espejo]]), np.concatenate([destino, origen[espejo]])
+            if pesos is not None:
+                pesos = np.concatenate([pesos, pesos[espejo]])
+        indptr, indices, pesos_fwd = cls._comprimir(origen, destino, n_nodos, pesos)
+        indptr_inv, indices_inv, pesos_inv = cls._comprimir(destino, origen, n_nodos, pesos)
+        return cls(indptr, indices, indptr_inv, indices_inv, ids=ids, valores=valores,
+                   pesos=pesos_fwd, pesos_inv=pesos_inv, dirigido=dirigido)
+
+    @classmethod
+    def desde_networkx(cls, G, atributos=('val',), peso='weight'):
+        ids = list(G.nodes())
+        indice = {n: i for i, n in enumerate(ids)}
+        datos = list(G.edges(data=True))
+        origen = np.fromiter((indice[u] for u, _, _ in datos), dtype=np.int64, count=len(datos))
+        destino = np.fromiter((indice[v] for _, v, _ in datos), dtype=np.int64, count=len(datos))
+        pesos = None
+        if peso is not None and any(peso in d for _, _, d in datos):
+            pesos = np.array([d.get(peso, 1) for _, _, d in datos])
+
+        valores = {}
+        for atributo in atributos:
+            if any(atributo in d for _, d in G.nodes(data=True)):
+                valores[atributo] = np.array([G.nodes[n].get(atributo, 0.0) for n in ids], dtype=float)
+        return cls.desde_aristas(origen, destino, len(ids), ids=cls._ids_compactos(ids), valores=valores,
+                                 pesos=pesos, dirigido=G.is_directed())
+
+    @classmethod
+    def desde_igraph(cls, g, atributos=('val',)):
+        aristas = np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        ids = g.vs['name'] if 'name' in g.vs.attributes() else None
+        valores = {a: np.array(g.vs[a], dtype=float) for a in atributos if a in g.vs.attributes()}
+        return cls.desde_aristas(aristas[:, 0], aristas[:, 1], g.vcount(),
+                                 ids=None if ids is None else cls._ids_compactos(ids),
+                                 valores=valores, dirigido=g.is_directed())
+
+    @staticmethod
+    def _ids_compactos(ids):
+        # Etiquetas enteras como arreglo numpy; cualquier otra cosa (str, tuplas) queda como lista.
+        if len(ids) > 0 and all(isinstance(n, (int, np.integer)) and not isinstance(n, bool) for n in ids):
+            return np.array(ids, dtype=np.int64)
+        return list(ids)
+
+    def con_valores(self, valores):
+        # Comparte la estructura (sin copiar) y solo reemplaza los arreglos por nodo.
+        return GrafoCSR(self.indptr, self.indices, self.indptr_inv, self.indices_inv, ids=self.ids,
+                        valores=valores, pesos=self.pesos, pesos_inv=self.pesos_inv, dirigido=self.dirigido)
+
+    def subgrafo(self, mascara, valores=None):
+        mascara = np.asarray(mascara, dtype=bool)
+        n = int(mascara.sum())
+        nuevo = np.full(self.n_nodos, -1, dtype=np.int64)
+        nuevo[mascara] = np.arange(n)
+        origen, destino = self.aristas()
+        conservar = mascara[origen] & mascara[destino]
+        if not self.dirigido:
+            conservar &= origen <= destino
+        ids = self.ids[mascara] if isinstance(self.ids, np.ndarray) else [i for i, m in zip(self.ids, mascara) if m]
+        if valores is None:
+            valores = {a: arr[mascara] for a, arr in self.valores.items()}
+        return GrafoCSR.desde_aristas(
+            nuevo[origen[conservar]], nuevo[destino[conservar]], n, ids=ids, valores=valores,
+            pesos=None if self.pesos is None else self.pesos[conservar], dirigido=self.dirigido
+        )
+
+    FORMATO_INSTANTANEA = 1
+    _CAMPOS = ('indptr', 'indices', 'indptr_inv', 'indices_inv', 'pesos', 'pesos_inv')
+
+    def guardar(self, ruta, metadatos=None):
+        # Instantanea: una carpeta con un .npy por arreglo (se pueden abrir con mmap) y grafo.json con
+        # la forma del grafo, su huella y los metadatos del generador. Se escribe en una carpeta
+        # temporal y se renombra al final, asi nunca queda una instantanea a medias.
+        temporal = f"{os.path.abspath(ruta)}.{os.getpid()}.tmp"
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+        archivos = {}
+        for campo in self._CAMPOS:
+            arreglo = getattr(self, campo)
+            if arreglo is not None:
+                archivos[campo] = f"{campo}.npy"
+                np.save(os.path.join(temporal, archivos[campo]), arreglo)
+        if isinstance(self.ids, np.ndarray) and not self.ids.dtype.hasobject:
+            archivos['ids'] = "ids.npy"
+            np.save(os.path.join(temporal, "ids.npy"), self.ids)
+        else:
+            # Etiquetas no enteras (str, tuplas): no se pueden mapear en memoria, van serializadas.
+            archivos['ids'] = "ids.pkl"
+            with open(os.path.join(temporal, "ids.pkl"), 'wb') as f:
+                pickle.dump(list(self.ids), f)
+        valores = {}
+        for i, (clave, arreglo) in enumerate(self.valores.items()):
+            valores[clave] = f"valor_{i}.npy"
+            np.save(os.path.join(temporal, valores[clave]), arreglo)
+
+        descripcion = {
+            'formato': self.FORMATO_INSTANTANEA,
+            'n_nodos': self.n_nodos,
+            'n_aristas': self.n_aristas,
+            'dirigido': self.dirigido,
+            'huella': self.huella(),
+            'archivos': archivos,
+            'valores': valores,
+            'metadatos': metadatos or {}
+        }
+        with open(os.path.join(temporal, "grafo.json"), 'w') as f:
+            json.dump(descripcion, f, indent=2, default=str)
+
+        if os.path.isdir(ruta):
+            shutil.rmtree(ruta)
+        os.replace(temporal, ruta)
+        return ruta
+
+    @staticmethod
+    def es_instantanea(ruta):
+        return os.path.isfile(os.path.join(ruta, "grafo.json"))
+
+    @staticmethod
+    def leer_metadatos(ruta):
+        with open(os.path.join(ruta, "grafo.json")) as f:
+            return json.load(f)['metadatos']
+
+    @classmethod
+    def cargar(cls, ruta, mmap_mode='r', devolver_metadatos=False):
+        # Con mmap_mode='r' los arreglos quedan en disco y se leen bajo demanda: abrir un grafo
+        # grande es inmediato y varios procesos comparten las mismas paginas.
+        with open(os.path.join(ruta, "grafo.json")) as f:
+            descripcion = json.load(f)
+        if descripcion.get('formato') != cls.FORMATO_INSTANTANEA:
+            raise ValueError(f"Formato de instantanea no soportado: {descripcion.get('formato')}")
+        archivos = descripcion['archivos']
+
+        def leer(nombre):
+            return np.load(os.path.join(ruta, nombre), mmap_mode=mmap_mode)
+
+        campos = {campo: leer(archivos[campo]) if campo in archivos else None for campo in cls._CAMPOS}
+        if archivos['ids'].endswith(".pkl"):
+            with open(os.path.join(ruta, archivos['ids']), 'rb') as f:
+                ids = pickle.load(f)
+        else:
+            ids = leer(archivos['ids'])
+        valores = {clave: leer(nombre) for clave, nombre in descripcion['valores'].items()}
+
+        G = cls(campos['indptr'], campos['indices'], campos['indptr_inv'], campos['indices_inv'], ids=ids,
+                valores=valores, pesos=campos['pesos'], pesos_inv=campos['pesos_inv'],
+                dirigido=descripcion['dirigido'])
+        # La huella guardada evita recorrer todos los arreglos (y leerlos del disco) para calcularla.
+        object.__setattr__(G, '_huella', descripcion['huella'])
+        return (G, descripcion['metadatos']) if devolver_metadatos else G
+
+    def a_networkx(self):
+        import networkx as nx
+        G = nx.DiGraph() if self.dirigido else nx.Graph()
+        ids = self.nodes()
+        G.add_nodes_from(
+            (ids[i], {a: arr[i] for a, arr in self.valores.items()}) for i in range(self.n_nodos)
+        )
+        origen, destino = self.aristas()
+        pesos = self.pesos
+        if not self.dirigido:
+            una_vez = origen <= destino
+            origen, destino = origen[una_vez], destino[una_vez]
+            pesos = None if pesos is None else pesos[una_vez]
+        if pesos is None:
+            G.add_edges_from((ids[u], ids[v]) for u, v in zip(origen.tolist(), destino.tolist()))
+        else:
+            G.add_weighted_edges_from(
+                (ids[u], ids[v], w) for u, v, w in zip(origen.tolist(), destino.tolist(), pesos.tolist())
+            )
+        return G
+
+
+def _solo_lectura(valor):
+    # Se congela una vista: los arreglos del llamador siguen siendo escribibles.
+    if isinstance(valor, np.ndarray):
+        valor = valor.view()
+        valor.flags.writeable = False
+    return valor
@@ -1,52 +1,43 @@
 import networkx as nx
-import igraph as ig
-import pandas as pd
 
 class ConvertidorGrafos:
 
     @staticmethod
-    def a_igraph(G_nx):
+    def a_igraph(G_nx, devolver_mapeo=False):
+        # El vertice i de igraph es el i-esimo nodo de G_nx.nodes(); 'nodos' traduce de vuelta.
         if G_nx is None:
             return None
+        import igraph as ig
 
-        df_edges = nx.to_pandas_edgelist(G_nx)
-        if not df_edges.empty:
-            df_edges['source'] = df_edges['source'].astype(str)
-            df_edges['target'] = df_edges['target'].astype(str)
-    
-        g_ig = ig.Graph.TupleList(
-            df_edges.itertuples(index=False), 
-            directed=G_nx.is_directed(), 
-            edge_attrs=list(df_edges.columns[2:]) 
-        )
+        nodos = list(G_nx.nodes())
+        indice = {n: i for i, n in enumerate(nodos)}
+        datos_aristas = list(G_nx.edges(data=True))
+        aristas = [(indice[u], indice[v]) for u, v, _ in datos_aristas]
+
+        g_ig = ig.Graph(n=len(nodos), edges=aristas, directed=G_nx.is_directed())
+        g_ig.vs['name'] = [str(n) for n in nodos]
 
-        for n in G_nx.nodes():
-            node_str = str(n)
-            try:
-                v = g_ig.vs.find(name=node_str)
-            except ValueError:
-                g_ig.add_vertex(name=node_str)
-                v = g_ig.vs.find(name=node_str)
-            attrs = G_nx.nodes[n].copy()
-            for key, value in attrs.items():
-                v[key] = value
-            
-        return g_ig
+        datos_nodos = [d for _, d in G_nx.nodes(data=True)]
+        for clave in set().union(*datos_nodos) if datos_nodos else ():
+            g_ig.vs[clave] = [d.get(clave) for d in datos_nodos]
+        for clave in set().union(*(d for _, _, d in datos_aristas)) if datos_aristas else ():
+            g_ig.es[clave] = [d.get(clave) for _, _, d in datos_aristas]
+
+        return (g_ig, nodos) if devolver_mapeo else g_ig
 
     @staticmethod
     def a_networkx(G_ig):
-        
-        edges = [(G_ig.vs[e.source]['name'], G_ig.vs[e.target]['name']) 
-                 for e in G_ig.es]
-        
+        atributos_v = G_ig.vs.attributes()
+        nombres = G_ig.vs['name'] if 'name' in atributos_v else list(range(G_ig.vcount()))
+        columnas_v = {a: G_ig.vs[a] for a in atributos_v if a != 'name'}
+        columnas_e = {a: G_ig.es[a] for a in G_ig.es.attributes()}
+
         G_nx = nx.DiGraph() if G_ig.is_directed() else nx.Graph()
-        G_nx.add_edges_from(edges)
-        
-        for v in G_ig.vs:
-            nombre = v['name']
-            atributos = v.attributes()
-            del atributos['name'] 
-            G_nx.nodes[nombre].update(atributos)
-            
+        G_nx.add_nodes_from(
+            (nombres[i], {a: col[i] for a, col in columnas_v.items()}) for i in range(G_ig.vcount())
+        )
+        G_nx.add_edges_from(
+            (nombres[s], nombres[t], {a: col[j] for a, col in columnas_e.items()})
+            for j, (s, t) in enumerate(G_ig.get_edgelist())
+        )
         return G_nx
-
@@ -0,0 +1,90 @@
+import io
+import time
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class RegistroTiempos:
+    # Tramos por fase de una simulacion: segundos acumulados y numero de entradas por nombre.
+    # Opcionalmente cada fase captura un perfil de cProfile y/o el pico de memoria de tracemalloc.
+    def __init__(self, cprofile=False, memoria=False, lineas_perfil=25):
+        self.cprofile = cprofile
+        self.memoria = memoria
+        self.lineas_perfil = lineas_perfil
+        self.segundos = {}
+        self.llamadas = {}
+        self.memoria_pico = {}
+        self.perfiles = {}
+        self._pila = []
+        self._perfil_activo = False
+        self._tracemalloc_propio = False
+
+    @contextmanager
+    def fase(self, nombre):
+        perfil = None
+        if self.cprofile and not self._perfil_activo:
+            # Solo un perfilador puede estar activo: las fases anidadas quedan dentro del perfil externo.
+            perfil = cProfile.Profile()
+            self._perfil_activo = True
+        marco = {'pico_hijos': 0, 'base': 0}
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc_propio = True
+            marco['base'] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._pila.append(marco)
+
+        inicio = time.perf_counter()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield self
+        finally:
+            if perfil is not None:
+                perfil.disable()
+                self._perfil_activo = False
+            transcurrido = time.perf_counter() - inicio
+            self._pila.pop()
+
+            self.segundos[nombre] = self.segundos.get(nombre, 0.0) + transcurrido
+            self.llamadas[nombre] = self.llamadas.get(nombre, 0) + 1
+            if self.memoria:
+                # reset_peak (Python 3.9+) es global: el pico de la fase es el mayor entre lo visto desde el ultimo
+                # reinicio y el de sus fases hijas, y se propaga a la fase padre.
+                pico = max(tracemalloc.get_traced_memory()[1], marco['pico_hijos'])
+                self.memoria_pico[nombre] = max(self.memoria_pico.get(nombre, 0), pico - marco['base'])
+                if self._pila:
+                    self._pila[-1]['pico_hijos'] = max(self._pila[-1]['pico_hijos'], pico)
+                elif self._tracemalloc_propio:
+                    tracemalloc.stop()
+                    self._tracemalloc_propio = False
+            if perfil is not None:
+                salida = io.StringIO()
+                pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(self.lineas_perfil)
+                self.perfiles[nombre] = self.perfiles.get(nombre, '') + salida.getvalue()
+
+    def columnas(self, prefijo="Tiempo_"):
+        return {f"{prefijo}{nombre}": s for nombre, s in self.segundos.items()}
+
+    def filas(self, **extra):
+        return [{
+            **extra,
+            "Fase": nombre,
+            "Segundos": s,
+            "Llamadas": self.llamadas[nombre],
+            "Memoria_Pico_Bytes": self.memoria_pico.get(nombre)
+        } for nombre, s in self.segundos.items()]
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado['_pila'] = []
+        estado['_perfil_activo'] = False
+        estado['_tracemalloc_propio'] = False
+        return estado
+
+
+def fase(registro, nombre):
+    return nullcontext() if registro is None else registro.fase(nombre)
@@ -0,0 +1,130 @@
+import sys
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+from .grafo_csr import GrafoCSR
+
+_ALINEACION = 64
+_CAMPOS_GRAFO = ('indptr', 'indices', 'indptr_inv', 'indices_inv', 'pesos', 'pesos_inv')
+_PREFIJO_VALOR = 'valor:'
+
+# Bloques abiertos y grafos reconstruidos en este proceso, por nombre de bloque: cada worker
+# adjunta una sola vez aunque reciba el manejador en muchas tareas.
+_BLOQUES = {}
+_GRAFOS = {}
+
+
+class MemoriaCompartida:
+    # Publica un dict de arreglos numpy en un unico bloque de multiprocessing.shared_memory.
+    # El proceso que lo crea es el dueno: cerrar() (o salir del 'with') cierra y borra el bloque.
+    # Lo que viaja a los workers es 'manejador', que solo lleva el nombre y la disposicion.
+    def __init__(self, arreglos, meta=None):
+        arreglos = {nombre: np.ascontiguousarray(a) for nombre, a in arreglos.items()}
+        disposicion, total = [], 0
+        for nombre, arreglo in arreglos.items():
+            if arreglo.dtype.hasobject:
+                raise TypeError(f"El arreglo '{nombre}' contiene objetos de Python y no se puede compartir")
+            total = -(-total // _ALINEACION) * _ALINEACION
+            disposicion.append((nombre, arreglo.dtype.str, arreglo.shape, total))
+            total += arreglo.nbytes
+
+        self._bloque = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        self._finalizador = weakref.finalize(self, _borrar_bloque, self._bloque)
+        for nombre, tipo, forma, desplazamiento in disposicion:
+            _copiar_en_bloque(self._bloque, arreglos[nombre], forma, tipo, desplazamiento)
+        self.manejador = ManejadorMemoria(self._bloque.name, disposicion, meta)
+
+    @classmethod
+    def desde_grafo(cls, G):
+        # CSR, pesos, ids enteros y cada arreglo de 'valores'. Los ids no numericos (str, tuplas)
+        # viajan en el manejador porque no caben en un bloque de bytes.
+        arreglos = {campo: getattr(G, campo) for campo in _CAMPOS_GRAFO if getattr(G, campo) is not None}
+        ids_numericos = isinstance(G.ids, np.ndarray) and not G.ids.dtype.hasobject
+        if ids_numericos:
+            arreglos['ids'] = G.ids
+        for clave, arreglo in G.valores.items():
+            arreglos[_PREFIJO_VALOR + clave] = arreglo
+        meta = {'grafo': True, 'dirigido': G.dirigido, 'ids': None if ids_numericos else list(G.ids)}
+        return cls(arreglos, meta)
+
+    @property
+    def nombre(self):
+        return self._bloque.name
+
+    @property
+    def nbytes(self):
+        return self._bloque.size
+
+    def cerrar(self):
+        self._finalizador()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class ManejadorMemoria:
+    # Referencia picklable a un bloque publicado. En cualquier proceso, arreglos() y grafo()
+    # devuelven vistas de solo lectura sobre la memoria compartida, sin copiar.
+    def __init__(self, nombre, disposicion, meta=None):
+        self.nombre = nombre
+        self.disposicion = disposicion
+        self.meta = dict(meta or {})
+
+    def __repr__(self):
+        return f"ManejadorMemoria(nombre={self.nombre!r}, arreglos={[d[0] for d in self.disposicion]})"
+
+    def arreglos(self):
+        bloque = _adjuntar(self.nombre)
+        vistas = {}
+        for nombre, tipo, forma, desplazamiento in self.disposicion:
+            vista = np.ndarray(forma, dtype=tipo, buffer=bloque.buf, offset=desplazamiento)
+            vista.flags.writeable = False
+            vistas[nombre] = vista
+        return vistas
+
+    def grafo(self):
+        if not self.meta.get('grafo'):
+            raise ValueError("El bloque no fue publicado con MemoriaCompartida.desde_grafo")
+        if self.nombre not in _GRAFOS:
+            a = self.arreglos()
+            valores = {k[len(_PREFIJO_VALOR):]: v for k, v in a.items() if k.startswith(_PREFIJO_VALOR)}
+            _GRAFOS[self.nombre] = GrafoCSR(
+                a['indptr'], a['indices'], a['indptr_inv'], a['indices_inv'],
+                ids=a['ids'] if 'ids' in a else self.meta['ids'], valores=valores,
+                pesos=a.get('pesos'), pesos_inv=a.get('pesos_inv'), dirigido=self.meta['dirigido']
+            )
+        return _GRAFOS[self.nombre]
+
+
+def liberar_adjuntos():
+    # Cierra (sin borrar) los bloques que este proceso adjunto. Un bloque con vistas todavia vivas
+    # no se puede cerrar: queda abierto y se libera al terminar el proceso.
+    _GRAFOS.clear()
+    for nombre in list(_BLOQUES):
+        try:
+            _BLOQUES[nombre].close()
+        except BufferError:
+            continue
+        del _BLOQUES[nombre]
+
+
+def _adjuntar(nombre):
+    if nombre not in _BLOQUES:
+        if sys.version_info >= (3, 13):
+            _BLOQUES[nombre] = shared_memory.SharedMemory(name=nombre, track=False)
+        else:
+            _BLOQUES[nombre] = shared_memory.SharedMemory(name=nombre)
+    return _BLOQUES[nombre]
+
+
+def _copiar_en_bloque(bloque, arreglo, forma, tipo, desplazamiento):
+    # La vista se descarta al salir: el bloque no puede cerrarse mientras exista.
+    np.ndarray(forma, dtype=tipo, buffer=bloque.buf, offset=desplazamiento)[...] = arreglo
+
+
+def _borrar_bloque(bloque):
+    bloque.close()
+    bloque.unlink()
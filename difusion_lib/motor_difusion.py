@@ -1,6 +1,7 @@
-import networkx as nx
 import numpy as np
 from scipy import sparse
+from scipy.sparse import csgraph
+from .grafo_csr import GrafoCSR
 
 class MotorDifusion:
     def __init__(self, G, tasa_difusion=0.7):
@@ -8,26 +9,230 @@ class MotorDifusion:
         self.tasa_difusion = tasa_difusion
         self._nodes = list(G.nodes())
         self._num_nodes = len(self._nodes)
+        self._indice = {n: i for i, n in enumerate(self._nodes)}
+        self._A = None
+        self._out_degrees = None
+        # Con un GrafoCSR (inmutable) el estado 'val' vive aqui en lugar de en los nodos del grafo.
+        self.valores = None
+        if isinstance(G, GrafoCSR):
+            self.valores = np.array(G.valores['val'], dtype=float) if 'val' in G.valores else np.zeros(self._num_nodes)
         self._M = self._preparar_matriz()
+        self.iteraciones_realizadas = 0
 
     def _preparar_matriz(self):
         if self._num_nodes == 0:
             return None
+        if isinstance(self.G, GrafoCSR):
+            # La adyacencia inversa ya es A^T en CSR: filas = destino, columnas = origen.
+            G = self.G
+            datos = np.ones(G.n_aristas, dtype=np.int64) if G.pesos_inv is None else np.array(G.pesos_inv)
+            self._A = sparse.csr_array((datos, np.array(G.indices_inv), np.array(G.indptr_inv)),
+                                       shape=(self._num_nodes, self._num_nodes))
+            self._out_degrees = np.asarray(self._A.sum(axis=0)).flatten()
+            return self._construir_matriz()
+        import networkx as nx
         A = nx.to_scipy_sparse_array(self.G, nodelist=self._nodes, format='csr').T
-        out_degrees = np.array(A.sum(axis=0)).flatten()
+        self._A = A.tocsr()
+        self._out_degrees = np.array(A.sum(axis=0)).flatten()
+        return self._construir_matriz()
+
+    def _leer_valores(self):
+        if self.valores is not None:
+            return self.valores.copy()
+        return np.array([self.G.nodes[n].get('val', 0.0) for n in self._nodes], dtype=float)
+
+    def _escribir_valores(self, v):
+        if self.valores is not None:
+            self.valores = v
+            return
+        for i, n in enumerate(self._nodes):
+            self.G.nodes[n]['val'] = v[i]
+
+    def _construir_matriz(self):
+        A, out_degrees = self._A.tocsc(), self._out_degrees
         with np.errstate(divide='ignore'):
             weights = self.tasa_difusion / out_degrees
-        weights[np.isinf(weights)] = 0  
+        weights[np.isinf(weights)] = 0
         M = A.dot(sparse.diags(weights))
         diag_values = np.where(out_degrees > 0, 1 - self.tasa_difusion, 1.0)
         M += sparse.diags(diag_values)
         return M.tocsr()
 
-    def ejecutar(self, iteraciones=100):
+    def eliminar_nodos(self, nodos):
+        # Recorta la adyacencia CSR existente en lugar de volver a leer el grafo de networkx.
+        # Solo los vecinos de entrada de los nodos eliminados pierden grado de salida, asi que
+        # solo sus pesos y su diagonal cambian al renormalizar.
+        idx = np.array(sorted({self._indice[n] for n in nodos if n in self._indice}), dtype=int)
+        if self.valores is None:
+            self.G.remove_nodes_from(nodos)
+        if len(idx) == 0 or self._M is None:
+            return
+
+        conservar = np.ones(self._num_nodes, dtype=bool)
+        conservar[idx] = False
+        restantes = np.flatnonzero(conservar)
+
+        entrantes = self._A[idx]
+        perdida = np.bincount(entrantes.indices, weights=entrantes.data, minlength=self._num_nodes)
+        afectados = np.flatnonzero(perdida > 0)
+        grados = self._out_degrees.copy()
+        grados[afectados] -= perdida[afectados].astype(grados.dtype)
+
+        self._nodes = [self._nodes[i] for i in restantes]
+        if self.valores is not None:
+            self.valores = self.valores[restantes]
+        self._num_nodes = len(self._nodes)
+        self._indice = {n: i for i, n in enumerate(self._nodes)}
+        if self._num_nodes == 0:
+            self._A, self._out_degrees, self._M = None, None, None
+            return
+
+        self._A = self._A[restantes][:, restantes]
+        self._out_degrees = grados[restantes]
+        self._M = self._construir_matriz()
+
+    def aplicar_mascara(self, vivos):
+        # Restringe la difusion a los nodos vivos sin recortar la matriz: las filas y columnas de
+        # los nodos muertos quedan vacias, asi que su masa se queda en cero y no recibe flujo.
+        if self._A is None:
+            return
+        vivos = np.asarray(vivos, dtype=bool)
+        A = sparse.diags(vivos.astype(float)).dot(self._A.tocsc())
+        out_degrees = self._A.T.dot(vivos.astype(self._A.dtype))
+        with np.errstate(divide='ignore'):
+            weights = np.where(vivos, self.tasa_difusion / out_degrees, 0.0)
+        weights[np.isinf(weights)] = 0
+        M = A.dot(sparse.diags(weights))
+        diag_values = np.where(out_degrees > 0, 1 - self.tasa_difusion, 1.0) * vivos
+        M += sparse.diags(diag_values)
+        M = M.tocsr()
+        M.eliminate_zeros()
+        M.sort_indices()
+        self._M = M
+
+    def propagar(self, v, iteraciones=100, tolerancia=None, norma='l1'):
+        if self._M is None:
+            return np.asarray(v, dtype=float)
+        return self._iterar(np.asarray(v, dtype=float), iteraciones, tolerancia=tolerancia, norma=norma)
+
+    def ejecutar(self, iteraciones=100, tolerancia=None, norma='l1'):
+        if self._M is None:
+            return 0
+        v = self._iterar(self._leer_valores(), iteraciones, tolerancia=tolerancia, norma=norma)
+        self._escribir_valores(v)
+        return self.iteraciones_realizadas
+
+    def ejecutar_estacionario(self):
         if self._M is None:
             return
-        v = np.array([self.G.nodes[n].get('val', 0.0) for n in self._nodes])
-        for _ in range(iteraciones):
-            v = self._M.dot(v)
-        for i, n in enumerate(self._nodes):
-            self.G.nodes[n]['val'] = v[i]
\ No newline at end of file
+        self._escribir_valores(self.estado_estacionario(self._leer_valores()))
+
+    def estado_estacionario(self, v):
+        # Limite de M^t v. La masa que sale de los componentes abiertos (transitorios) termina
+        # repartida entre los componentes cerrados, y dentro de cada uno se reparte segun su
+        # distribucion estacionaria. Ambas partes se resuelven con sistemas lineales dispersos.
+        from scipy.sparse.linalg import spsolve
+        M = self._M
+        n = self._num_nodes
+        v = np.asarray(v, dtype=float)
+        n_comp, etiquetas = csgraph.connected_components(M, directed=True, connection='strong')
+
+        C = M.tocoo()
+        cruza = (etiquetas[C.row] != etiquetas[C.col]) & (C.data != 0)
+        abierto = np.zeros(n_comp, dtype=bool)
+        abierto[etiquetas[C.col[cruza]]] = True
+        transitorios = np.flatnonzero(abierto[etiquetas])
+        cerrados = np.flatnonzero(~abierto[etiquetas])
+
+        masa_componente = np.bincount(etiquetas[cerrados], weights=v[cerrados], minlength=n_comp)
+        if len(transitorios) > 0:
+            M_tt = M[transitorios][:, transitorios]
+            ocupacion = spsolve(sparse.identity(len(transitorios), format='csc') - M_tt.tocsc(), v[transitorios])
+            flujo = M[cerrados][:, transitorios].dot(np.atleast_1d(ocupacion))
+            masa_componente += np.bincount(etiquetas[cerrados], weights=flujo, minlength=n_comp)
+
+        # En cada componente cerrado se sustituye una ecuacion de (M - I) pi = 0 por la de masa.
+        etiq_local = etiquetas[cerrados]
+        _, primero = np.unique(etiq_local, return_index=True)
+        conservar = np.ones(len(cerrados))
+        conservar[primero] = 0
+        B = sparse.diags(conservar).dot(M[cerrados][:, cerrados] - sparse.identity(len(cerrados)))
+        fila_masa = np.zeros(n_comp, dtype=int)
+        fila_masa[etiq_local[primero]] = primero
+        B = B + sparse.csr_matrix(
+            (np.ones(len(cerrados)), (fila_masa[etiq_local], np.arange(len(cerrados)))),
+            shape=B.shape
+        )
+        b = np.zeros(len(cerrados))
+        b[primero] = masa_componente[etiq_local[primero]]
+
+        resultado = np.zeros(n)
+        resultado[cerrados] = spsolve(B.tocsc(), b)
+        return resultado
+
+    def _estados_desde_semillas(self, semillas, valor_inicio=1.0, masa_total=None):
+        indice = {n: i for i, n in enumerate(self._nodes)}
+        V = np.zeros((self._num_nodes, len(semillas)))
+        for b, conjunto in enumerate(semillas):
+            conjunto = list(conjunto)
+            for n in conjunto:
+                if masa_total is not None:
+                    V[indice[n], b] = masa_total / len(conjunto)
+                else:
+                    V[indice[n], b] = valor_inicio.get(n, 1.0) if isinstance(valor_inicio, dict) else float(valor_inicio)
+        return V
+
+    def ejecutar_lote(self, estados=None, semillas=None, iteraciones=100, valor_inicio=1.0, masa_total=None,
+                      tolerancia=None, norma='l1'):
+        # Cada columna es una difusion independiente: una sola SpMM por iteracion para las B columnas.
+        if estados is None and semillas is None:
+            raise ValueError("Especifica 'estados' (n_nodos x B) o 'semillas' (lista de conjuntos).")
+        if self._M is None:
+            return np.zeros((0, 0)), np.zeros((0, 0))
+
+        if estados is not None:
+            V = np.array(estados, dtype=float)
+            if V.ndim == 1:
+                V = V[:, np.newaxis]
+        else:
+            V = self._estados_desde_semillas(semillas, valor_inicio, masa_total)
+
+        if V.shape[0] != self._num_nodes:
+            raise ValueError(f"Se esperaban {self._num_nodes} filas en 'estados', se recibieron {V.shape[0]}.")
+
+        picos = np.zeros_like(V)
+        V = self._iterar(V, iteraciones, picos, tolerancia=tolerancia, norma=norma)
+        return V, picos
+
+    def _iterar(self, V, iteraciones, picos=None, llegada=None, umbral_contacto=0.0, tolerancia=None, norma='l1'):
+        if llegada is not None:
+            llegada[(llegada < 0) & (V > umbral_contacto)] = 0
+        self.iteraciones_realizadas = 0
+        for i in range(iteraciones):
+            V_nuevo = self._M.dot(V)
+            if picos is not None:
+                np.maximum(picos, V_nuevo, out=picos)
+            if llegada is not None:
+                llegada[(llegada < 0) & (V_nuevo > umbral_contacto)] = i + 1
+            self.iteraciones_realizadas = i + 1
+            if tolerancia is not None:
+                cambio = np.abs(V_nuevo - V)
+                cambio = cambio.sum(axis=0) if norma == 'l1' else cambio.max(axis=0)
+                if np.all(cambio < tolerancia):
+                    return V_nuevo
+            V = V_nuevo
+        return V
+
+    def ejecutar_con_picos(self, iteraciones=100, primer_contacto=False, umbral_contacto=0.0,
+                           tolerancia=None, norma='l1'):
+        # Lee 'val' una sola vez, itera en numpy y escribe de vuelta al grafo solo al final.
+        if self._M is None:
+            return np.zeros(0), (np.zeros(0, dtype=int) if primer_contacto else None)
+        v = self._leer_valores()
+        picos = np.zeros(self._num_nodes)
+        llegada = np.full(self._num_nodes, -1, dtype=int) if primer_contacto else None
+
+        v = self._iterar(v, iteraciones, picos, llegada, umbral_contacto, tolerancia, norma)
+
+        self._escribir_valores(v)
+        return picos, llegada
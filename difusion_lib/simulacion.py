@@ -1,23 +1,44 @@
 import os
 import time
+import random
+import inspect
 import math
 import statistics
 import re
 import uuid
 import numpy as np
-import pandas as pd
 import networkx as nx
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from .instrumentacion import RegistroTiempos, fase
+from .memoria_compartida import MemoriaCompartida, ManejadorMemoria, liberar_adjuntos
 from difusion_lib import (
     GeneradorRedes, 
     ControladorPelado, 
     AnalizadorCELF, 
     AnalizadorRIS, 
     VisualizadorPelado, 
-    ConvertidorGrafos
+    GrafoCSR,
+    MotorDifusion,
+    CacheDifusion,
+    CargadorAristas
 )
 
 class ProcesadorSimulaciones:
+    MAPEO_GENERADORES = {
+        'malla_netlogo': GeneradorRedes.generar_malla_estocastica_netlogo,
+        'cascada': GeneradorRedes.generar_cascada_estricta,
+        'flujo_libre': GeneradorRedes.generar_flujo_libre_escala,
+        'sbm': GeneradorRedes.generar_sbm_estocastico,
+        'gaussiana': GeneradorRedes.generar_red_gaussiana,
+        'red_social_realista' : GeneradorRedes.generar_red_social_realista,
+        'malla_netlogo_csr': GeneradorRedes.generar_malla_estocastica_netlogo_csr,
+        'cascada_csr': GeneradorRedes.generar_cascada_estricta_csr,
+        'flujo_libre_csr': GeneradorRedes.generar_flujo_libre_escala_csr,
+        'sbm_csr': GeneradorRedes.generar_sbm_estocastico_csr,
+        'gaussiana_csr': GeneradorRedes.generar_red_gaussiana_csr,
+        'red_social_realista_csr': GeneradorRedes.generar_red_social_realista_csr
+    }
+
     def __init__(self):
         pass
 
@@ -78,44 +99,347 @@ class ProcesadorSimulaciones:
             return f"Peeling #{index} (Mass>{m})"
         return f"{method.upper()} #{index}"
 
-    def _ejecutar_difusion_y_metricas(self, label, seeds, G_original, params, folder_base, titulo_base):
+    def _metricas_record(self, record, n_total):
+        n_mojados = int(self.cantidad_nodos_mojados(record))
+        return {
+            "Nodos_Mojados": n_mojados,
+            "Ratio_Mojados": n_mojados / n_total if n_total > 0 else 0.0,
+            "Entropia": float(self.uniformidad_entropia(record)),
+            "Gini": float(self.gini(record)),
+            "cv": float(self.coeficiente_variacion(record))
+        }
+
+    def _ejecutar_difusion_y_metricas(self, label, seeds, G_original, params, folder_base, titulo_base, cache=None, registro=None):
         if not seeds:
             return {}, [], []
 
-        ctrl = ControladorPelado(G_original)
+        k = len(seeds)
+        n_total = len(G_original)
+
+        # Sin visualizaciones la difusion solo depende del grafo, las semillas y los parametros; si se
+        # exporta, un acierto reescribe Masa_Final.csv desde el record guardado.
+        usar_cache = cache is not None and not params['visualizar']
+        entrada = None
+        if usar_cache:
+            with fase(registro, "cache_difusion"):
+                clave = cache.clave(G_original.huella(), seeds, params['tasa'], params['iteraciones'], params['masa_total'])
+                entrada = cache.obtener(clave)
+
         folder_export = os.path.join(folder_base, f"Difusion_{label}")
+        if entrada is not None:
+            record_final, base = entrada
+            figs = []
+            if params['exportar']:
+                ControladorPelado(G_original).exportar_masa_final(record_final, folder_export)
+        else:
+            ctrl = ControladorPelado(G_original)
+            
+            start_val = params['masa_total'] / k if k > 0 else 0
+
+            # Con visualizaciones o exportacion activas, esta fase incluye armar figuras y escribir CSVs.
+            with fase(registro, "difusion"):
+                _, figs, record_final = ctrl.ejecutar_estudio(
+                    iteraciones=params['iteraciones'],
+                    nodos=list(seeds),
+                    tasa_difusion=params['tasa'],
+                    valor_inicio=start_val,
+                    exportar_resultados=params['exportar'],
+                    carpeta_exportacion=folder_export,
+                    generar_visualizaciones=params['visualizar']
+                )
+
+            for i, fig in enumerate(figs):
+                state_name = "Initial State" if i == 0 else "Spread Result"
+                fig.layout.title.text = f"{titulo_base} | {state_name}"
+
+            with fase(registro, "metricas"):
+                base = self._metricas_record(record_final, n_total)
+            if usar_cache:
+                cache.guardar(clave, record_final, base)
+
+        metricas = {f"{nombre}_{label}": valor for nombre, valor in base.items()}
+        metricas[f"Semillas_{label}"] = str(list(seeds))
+        metricas[f"K_{label}"] = k
         
-        k = len(seeds)
-        start_val = params['masa_total'] / k if k > 0 else 0
-
-        _, figs, record_final = ctrl.ejecutar_estudio(
-            iteraciones=params['iteraciones'],
-            nodos=list(seeds),
-            tasa_difusion=params['tasa'],
-            valor_inicio=start_val,
-            exportar_resultados=params['exportar'],
-            carpeta_exportacion=folder_export,
-            generar_visualizaciones=params['visualizar']
-        )
+        return metricas, figs, record_final
 
-        for i, fig in enumerate(figs):
-            state_name = "Initial State" if i == 0 else "Spread Result"
-            fig.layout.title.text = f"{titulo_base} | {state_name}"
+    def _difundir_lote(self, corridas, G_original, params, folder_base, cache=None, registro=None):
+        # corridas: [(label, seeds, titulo)] de una simulacion. Las difusiones que no estan en el cache
+        # comparten un solo MotorDifusion y corren juntas en ejecutar_lote (una SpMM por iteracion para
+        # todas). Con visualizaciones cada una necesita su grafo final y se corre por separado.
+        if params['visualizar']:
+            return [
+                self._ejecutar_difusion_y_metricas(label, seeds, G_original, params, folder_base, titulo,
+                                                   cache=cache, registro=registro)[:2]
+                for label, seeds, titulo in corridas
+            ]
 
         n_total = len(G_original)
-        n_mojados = self.cantidad_nodos_mojados(record_final)
+        records, bases, claves, faltan = {}, {}, {}, []
+        for j, (label, seeds, _) in enumerate(corridas):
+            if not seeds:
+                continue
+            if cache is not None:
+                with fase(registro, "cache_difusion"):
+                    claves[j] = cache.clave(G_original.huella(), seeds, params['tasa'], params['iteraciones'], params['masa_total'])
+                    entrada = cache.obtener(claves[j])
+                if entrada is not None:
+                    records[j], bases[j] = entrada
+                    continue
+            faltan.append(j)
+
+        if faltan:
+            with fase(registro, "difusion"):
+                motor = MotorDifusion(G_original, tasa_difusion=params['tasa'])
+                _, picos = motor.ejecutar_lote(
+                    semillas=[list(corridas[j][1]) for j in faltan],
+                    iteraciones=params['iteraciones'],
+                    masa_total=params['masa_total']
+                )
+            for columna, j in enumerate(faltan):
+                records[j] = np.ascontiguousarray(picos[:, columna])
+                with fase(registro, "metricas"):
+                    bases[j] = self._metricas_record(records[j], n_total)
+                if cache is not None:
+                    cache.guardar(claves[j], records[j], bases[j])
+
+        ctrl = ControladorPelado(G_original) if params['exportar'] else None
+        resultados = []
+        for j, (label, seeds, _) in enumerate(corridas):
+            if not seeds:
+                resultados.append(({}, []))
+                continue
+            if ctrl is not None:
+                ctrl.exportar_masa_final(records[j], os.path.join(folder_base, f"Difusion_{label}"))
+            metricas = {f"{nombre}_{label}": valor for nombre, valor in bases[j].items()}
+            metricas[f"Semillas_{label}"] = str(list(seeds))
+            metricas[f"K_{label}"] = len(seeds)
+            resultados.append((metricas, []))
+        return resultados
+
+    def _grafo_instantanea(self, tipo, params_especificos, semilla, batch_idx):
+        # Un lote con params['instantanea'] genera su grafo una sola vez (o lo abre si la carpeta ya
+        # existe) y todas sus simulaciones lo comparten. La semilla del generador depende solo de
+        # (semilla, batch), asi una segunda bateria encuentra los mismos parametros y reutiliza el grafo.
+        func_generadora = self.MAPEO_GENERADORES[tipo]
+        if 'instantanea' not in inspect.signature(func_generadora).parameters:
+            raise ValueError(f"El generador '{tipo}' no admite instantaneas; use su variante '{tipo}_csr'")
+        kwargs_generador = dict(params_especificos)
+        if semilla is not None and 'semilla' in inspect.signature(func_generadora).parameters:
+            semilla_lote = np.random.SeedSequence(semilla, spawn_key=(batch_idx,)).generate_state(1)[0]
+            kwargs_generador.setdefault('semilla', int(semilla_lote))
+        return func_generadora(**kwargs_generador)
+
+    def _ejecutar_simulacion(self, i, batch_idx, tipo, params_especificos, params_raw_str, G_custom, folder_tipo,
+                             execution_plan, opciones, semilla_sim=None):
+        # En un worker, G_custom es el manejador del grafo en memoria compartida. Al terminar la tarea ya
+        # no quedan vistas vivas sobre el bloque y se cierra su adjunto; la tarea siguiente lo vuelve a abrir.
+        try:
+            return self._simular(i, batch_idx, tipo, params_especificos, params_raw_str, G_custom, folder_tipo,
+                                 execution_plan, opciones, semilla_sim)
+        finally:
+            if isinstance(G_custom, ManejadorMemoria):
+                liberar_adjuntos()
+
+    def _simular(self, i, batch_idx, tipo, params_especificos, params_raw_str, G_custom, folder_tipo,
+                 execution_plan, opciones, semilla_sim=None):
+        # Una simulacion completa e independiente (puede correr en otro proceso): devuelve su fila de
+        # metricas, sus figuras y su RegistroTiempos. Con semilla_sim, random/np.random y cada metodo
+        # quedan sembrados.
+        exportar_resultados = opciones['exportar_resultados']
+        generar_visualizaciones = opciones['generar_visualizaciones']
+        generar_visualizaciones_pelado = opciones['generar_visualizaciones_pelado']
+        tasa_difusion = opciones['tasa_difusion']
+        masa_total_concentrada = opciones['masa_total_concentrada']
+        default_iteraciones_pelado = opciones['default_iteraciones_pelado']
+        default_umbral_masa = opciones['default_umbral_masa']
+        default_umbral_nodos = opciones['default_umbral_nodos']
+        usar_cfc = opciones['usar_cfc']
+        params_difusion_base = opciones['params_difusion_base']
+        cache = opciones['cache']
+        registro = RegistroTiempos(cprofile=opciones['perfilar'], memoria=opciones['medir_memoria'])
+
+        semilla_int, semillas_plan = None, [None] * len(execution_plan)
+        if semilla_sim is not None:
+            semilla_int = int(semilla_sim.generate_state(1)[0])
+            semillas_plan = [int(s.generate_state(1)[0]) for s in semilla_sim.spawn(len(execution_plan))]
+            random.seed(semilla_int)
+            np.random.seed(semilla_int)
+
+        mega_recolector_figs = {}
+
+        sim_id = f"Simulacion_{i+1:03d}" 
+        print(f">>> {tipo} - {sim_id}")
         
-        metricas = {
-            f"Nodos_Mojados_{label}": n_mojados,
-            f"Ratio_Mojados_{label}": n_mojados / n_total if n_total > 0 else 0.0,
-            f"Entropia_{label}": self.uniformidad_entropia(record_final),
-            f"Gini_{label}": self.gini(record_final),
-            f"cv_{label}": self.coeficiente_variacion(record_final),
-            f"Semillas_{label}": str(list(seeds)),
-            f"K_{label}": k
-        }
+        with fase(registro, "generacion"):
+            if G_custom is None:
+                func_generadora = self.MAPEO_GENERADORES[tipo]
+                kwargs_generador = dict(params_especificos)
+                if semilla_int is not None and 'semilla' in inspect.signature(func_generadora).parameters:
+                    kwargs_generador.setdefault('semilla', semilla_int)
+                resultado_generador = func_generadora(**kwargs_generador)
+                G_original = resultado_generador[0] if isinstance(resultado_generador, tuple) else resultado_generador
+            elif isinstance(G_custom, ManejadorMemoria):
+                G_original = G_custom.grafo()
+            else: 
+                G_original = G_custom
+
+        # Una sola representacion CSR por simulacion: pelado, difusion, CELF y RIS la comparten.
+        if not isinstance(G_original, GrafoCSR):
+            with fase(registro, "conversion"):
+                G_original = GrafoCSR.desde_networkx(G_original)
+            
+        n_total_nodos = len(G_original)
         
-        return metricas, figs, record_final
+        folder_sim = os.path.join(folder_tipo, sim_id) if exportar_resultados else ""
+
+        with fase(registro, "pelado_base"):
+            ctrl_peel = ControladorPelado(G_original)
+            _, figs_peel, G_survivors, pelados_dict = ctrl_peel.ejecutar_estudio_pelado(
+                generar_visualizaciones=generar_visualizaciones_pelado,
+                num_pelados=10,
+                iteraciones_por_pelado=default_iteraciones_pelado,
+                umbral_masa=default_umbral_masa,
+                umbral_nodos_final=default_umbral_nodos, 
+                tasa_difusion=tasa_difusion,
+                exportar_resultados=exportar_resultados,
+                carpeta_exportacion=os.path.join(folder_sim, "Baseline_Peel"),
+                usar_cfc=usar_cfc
+            )
+        base_k = len(G_survivors.nodes()) 
+
+        base_pretty_name = self._generate_pretty_name("baseline", {}, 0)
+
+        if generar_visualizaciones and generar_visualizaciones_pelado:
+            for f_idx, fig in enumerate(figs_peel):
+                fig.layout.title.text = f"Peeling Phase: {base_pretty_name} | Layer {f_idx+1}"
+            mega_recolector_figs[f"{sim_id} - PeelLayers - Baseline"] = figs_peel
+
+        fila_metricas = {
+            "Simulacion_ID": sim_id,
+            "Tipo_Grafo": tipo + str(params_raw_str), 
+            "Batch_ID": batch_idx,
+            "Total_Nodos_Inicial": n_total_nodos,
+            "Baseline_Survivors_K": base_k,
+            "Baseline_Layers": len(pelados_dict)
+        }
+
+        # Las difusiones (baseline y una por metodo) se juntan y corren al final en un solo lote.
+        seeds_baseline = list(G_survivors.nodes())
+        corridas = [("Baseline", seeds_baseline, f"Diffusion Simulation: {base_pretty_name}")]
+        extras = [{}]
+
+        method_counters = {'pel': 0, 'celf': 0, 'ris': 0}
+
+        for plan_item, semilla_metodo in zip(execution_plan, semillas_plan):
+            method_name = list(plan_item.keys())[0]
+            method_params = plan_item[method_name]
+            
+            method_counters[method_name] = method_counters.get(method_name, 0) + 1
+            current_idx = method_counters[method_name]
+            
+            run_label = self._generate_run_label(method_name, method_params, current_idx)
+            pretty_name = self._generate_pretty_name(method_name, method_params, current_idx)
+            
+            print(f"   Running {pretty_name}...")
+
+            found_seeds = []
+            extras_metodo = {}
+            start_time_method = time.time()
+
+            with fase(registro, f"seleccion_{method_name}"):
+                if method_name == 'pel':
+                    ctrl_run = ControladorPelado(G_original)
+                
+                    user_path = method_params.get('carpeta_exportacion', folder_sim)
+                    user_filename = method_params.get('nombre_resumen', f"resumen_pelado.csv")
+                
+                    unique_id = str(uuid.uuid4())[:8]
+                    unique_export_path = os.path.join(user_path, f"Sim_{i+1:03d}_{run_label}_{unique_id}")
+                    if not os.path.exists(unique_export_path):
+                        os.makedirs(unique_export_path)
+
+                    if user_filename.endswith('.csv'):
+                        unique_filename = user_filename.replace('.csv', f"_{run_label}_{unique_id}.csv")
+                    else:
+                        unique_filename = f"{user_filename}_{run_label}_{unique_id}.csv"
+
+                    run_params = {
+                        'num_pelados': 10,
+                        'iteraciones_por_pelado': default_iteraciones_pelado,
+                        'umbral_masa': default_umbral_masa,
+                        'umbral_nodos_final': default_umbral_nodos,
+                        'tasa_difusion': tasa_difusion,
+                        'valor_inicio': masa_total_concentrada / n_total_nodos if n_total_nodos > 0 else 0,
+                        'mostrar_graficos': False,
+                        'exportar_resultados': False,
+                        'generar_visualizaciones': generar_visualizaciones, 
+                        'usar_cfc': usar_cfc
+                    }
+                
+                    run_params.update(method_params)
+                    run_params['carpeta_exportacion'] = unique_export_path
+                    run_params['nombre_resumen'] = unique_filename
+
+                    _, figs_run, G_surv_run, _ = ctrl_run.ejecutar_estudio_pelado(**run_params)
+                    found_seeds = list(G_surv_run.nodes())
+
+                    if generar_visualizaciones:
+                        for f_idx, fig in enumerate(figs_run):
+                            fig.layout.title.text = f"Peeling Phase: {pretty_name} | Layer {f_idx+1}"
+                        mega_recolector_figs[f"{sim_id} - PeelLayers - {run_label}"] = figs_run
+
+                elif method_name == 'celf':
+                    target_k = method_params.get('k', base_k)
+                    if target_k == 0: target_k = 1
+
+                    p_celf = method_params.get('p', 0.1)
+                    mc_celf = method_params.get('mc', 100)
+                
+                    found_seeds, _, _, _ = AnalizadorCELF.ejecutar_celf(
+                        g=G_original, k=target_k, p=p_celf, mc=mc_celf, semilla=semilla_metodo
+                    )
+
+                elif method_name == 'ris':
+                    target_k = method_params.get('k', base_k)
+                    if target_k == 0: target_k = 1
+
+                    p_ris = method_params.get('p', 0.01)
+                    mc_ris = method_params.get('mc', 1000)
+
+                    if 'epsilon' in method_params:
+                        found_seeds, _, info_imm = AnalizadorRIS.ris_imm(
+                            G=G_original, k=target_k, p=p_ris,
+                            epsilon=method_params['epsilon'], ell=method_params.get('ell', 1), semilla=semilla_metodo
+                        )
+                        extras_metodo[f"Theta_{run_label}"] = info_imm['theta']
+                    else:
+                        found_seeds, _ = AnalizadorRIS.ris(G=G_original, k=target_k, p=p_ris, mc=mc_ris, semilla=semilla_metodo)
+
+            time_taken = time.time() - start_time_method
+            extras_metodo[f"Time_Exec_{run_label}"] = time_taken
+
+            corridas.append((run_label, found_seeds, f"Diffusion Simulation: {pretty_name}"))
+            extras.append(extras_metodo)
+
+        resultados_difusion = self._difundir_lote(
+            corridas, G_original, params_difusion_base, folder_sim, cache=cache, registro=registro
+        )
+        for (run_label, _, _), extras_metodo, (met_results, figs_diff) in zip(corridas, extras, resultados_difusion):
+            fila_metricas.update(extras_metodo)
+            fila_metricas.update(met_results)
+            if generar_visualizaciones:
+                mega_recolector_figs[f"{sim_id} - Difusion - {run_label}"] = figs_diff
+
+        fila_metricas.update(registro.columnas())
+        if exportar_resultados and registro.perfiles:
+            carpeta_perfiles = os.path.join(folder_sim, "perfiles")
+            os.makedirs(carpeta_perfiles, exist_ok=True)
+            for nombre, texto in registro.perfiles.items():
+                with open(os.path.join(carpeta_perfiles, f"{nombre}.txt"), "w") as f:
+                    f.write(texto)
+
+        return fila_metricas, mega_recolector_figs, registro
 
     def ejecutar_bateria_masiva(
         self,
@@ -133,21 +457,19 @@ class ProcesadorSimulaciones:
         default_iteraciones_pelado=150,
         default_umbral_masa=1.0,
         default_umbral_nodos=1,
-        usar_cfc=False
+        usar_cfc=False,
+        n_workers=None,
+        semilla=None,
+        cache_difusion=None,
+        perfilar=False,
+        medir_memoria=False
     ):
-        mapeo_generadores = {
-            'malla_netlogo': GeneradorRedes.generar_malla_estocastica_netlogo,
-            'cascada': GeneradorRedes.generar_cascada_estricta,
-            'flujo_libre': GeneradorRedes.generar_flujo_libre_escala,
-            'sbm': GeneradorRedes.generar_sbm_estocastico,
-            'gaussiana': GeneradorRedes.generar_red_gaussiana,
-            'red_social_realista' : GeneradorRedes.generar_red_social_realista
-        }
-
+        import pandas as pd
         if not os.path.exists(master_folder):
             os.makedirs(master_folder)
 
         resumen_global = []
+        tiempos_global = []
         
         params_difusion_base = {
             'iteraciones': iteraciones_difusion,
@@ -157,9 +479,32 @@ class ProcesadorSimulaciones:
             'visualizar': generar_visualizaciones
         }
         
+        # graph tambien puede ser la carpeta de una instantanea (GrafoCSR.guardar) o una lista de
+        # aristas en texto (CargadorAristas, que deja su propia instantanea junto al archivo).
+        if isinstance(graph, (str, os.PathLike)):
+            graph = GrafoCSR.cargar(graph) if os.path.isdir(graph) else CargadorAristas.cargar(graph)
         isCustomGraph = len(graph.nodes()) != 0
         if isCustomGraph:
             configuraciones_grafos = [1]
+        G_custom = None
+        if isCustomGraph:
+            G_custom = graph if isinstance(graph, GrafoCSR) else GrafoCSR.desde_networkx(graph)
+
+        # cache_difusion: True (LRU en memoria), una ruta (LRU + .npz en disco) o un CacheDifusion.
+        if cache_difusion is True:
+            cache_difusion = CacheDifusion()
+        elif isinstance(cache_difusion, str):
+            cache_difusion = CacheDifusion(carpeta=cache_difusion)
+
+        paralelo = n_workers is not None and n_workers > 1
+        # Cada tarea recibe una copia del cache: en paralelo el LRU en memoria de un worker arranca
+        # vacio y nunca vuelve al proceso principal. Solo una carpeta en disco se comparte entre procesos,
+        # y como nunca se vacia, solo se usa si quien llama la pide.
+        if paralelo and cache_difusion is not None and not cache_difusion.carpeta:
+            print("Aviso: cache_difusion en memoria no se comparte entre workers y queda desactivado; "
+                  "pase una carpeta (cache_difusion='ruta') para usarlo con n_workers > 1.")
+            cache_difusion = None
+        raiz_semillas = np.random.SeedSequence(semilla) if semilla is not None or paralelo else None
 
         for batch_idx, config in enumerate(configuraciones_grafos):
             if not isCustomGraph:
@@ -181,6 +526,10 @@ class ProcesadorSimulaciones:
             else:
                 folder_tipo = ""
 
+            G_lote = G_custom
+            if not isCustomGraph and 'instantanea' in params_especificos:
+                G_lote = self._grafo_instantanea(tipo, params_especificos, semilla, batch_idx)
+
             resumen_metricas = []     
             mega_recolector_figs = {} 
 
@@ -189,175 +538,86 @@ class ProcesadorSimulaciones:
             print(f"Parámetros: {params_especificos}")
             print("="*50)
             
-            for i in range(n_simulaciones):
-                sim_id = f"Simulacion_{i+1:03d}" 
-                print(f">>> {tipo} - {sim_id}")
-                
-                if not isCustomGraph:
-                    func_generadora = mapeo_generadores[tipo]
-                    resultado_generador = func_generadora(**params_especificos)
-                    G_original = resultado_generador[0] if isinstance(resultado_generador, tuple) else resultado_generador
-                else: 
-                    G_original = graph
-                    
-                n_total_nodos = len(G_original)
-                
-                folder_sim = os.path.join(folder_tipo, sim_id) if exportar_resultados else ""
-
-                ctrl_peel = ControladorPelado(G_original.copy()) 
-                start_peel_base = time.time()
-                _, figs_peel, G_survivors, pelados_dict = ctrl_peel.ejecutar_estudio_pelado(
-                    generar_visualizaciones=generar_visualizaciones_pelado,
-                    num_pelados=10,
-                    iteraciones_por_pelado=default_iteraciones_pelado,
-                    umbral_masa=default_umbral_masa,
-                    umbral_nodos_final=default_umbral_nodos, 
-                    tasa_difusion=tasa_difusion,
-                    exportar_resultados=exportar_resultados,
-                    carpeta_exportacion=os.path.join(folder_sim, "Baseline_Peel"),
-                    usar_cfc=usar_cfc
-                )
-                base_k = len(G_survivors.nodes()) 
-
-                base_pretty_name = self._generate_pretty_name("baseline", {}, 0)
-
-                if generar_visualizaciones and generar_visualizaciones_pelado:
-                    for f_idx, fig in enumerate(figs_peel):
-                        fig.layout.title.text = f"Peeling Phase: {base_pretty_name} | Layer {f_idx+1}"
-                    mega_recolector_figs[f"{sim_id} - PeelLayers - Baseline"] = figs_peel
-
-                fila_metricas = {
-                    "Simulacion_ID": sim_id,
-                    "Tipo_Grafo": tipo + str(params_raw_str), 
-                    "Batch_ID": batch_idx,
-                    "Total_Nodos_Inicial": n_total_nodos,
-                    "Baseline_Survivors_K": base_k,
-                    "Baseline_Layers": len(pelados_dict)
-                }
-
-                seeds_baseline = list(G_survivors.nodes())
-                met_baseline, figs_diff_base, _ = self._ejecutar_difusion_y_metricas(
-                    "Baseline", seeds_baseline, G_original.copy(), params_difusion_base, folder_sim, f"Diffusion Simulation: {base_pretty_name}"
-                )
-                fila_metricas.update(met_baseline)
-                if generar_visualizaciones:
-                    mega_recolector_figs[f"{sim_id} - Difusion - Baseline"] = figs_diff_base
-
-                method_counters = {'pel': 0, 'celf': 0, 'ris': 0}
-
-                for plan_item in execution_plan:
-                    method_name = list(plan_item.keys())[0]
-                    method_params = plan_item[method_name]
-                    
-                    method_counters[method_name] = method_counters.get(method_name, 0) + 1
-                    current_idx = method_counters[method_name]
-                    
-                    run_label = self._generate_run_label(method_name, method_params, current_idx)
-                    pretty_name = self._generate_pretty_name(method_name, method_params, current_idx)
-                    
-                    print(f"   Running {pretty_name}...")
-
-                    found_seeds = []
-                    start_time_method = time.time()
-
-                    if method_name == 'pel':
-                        ctrl_run = ControladorPelado(G_original.copy())
-                        
-                        user_path = method_params.get('carpeta_exportacion', folder_sim)
-                        user_filename = method_params.get('nombre_resumen', f"resumen_pelado.csv")
-                        
-                        unique_id = str(uuid.uuid4())[:8]
-                        unique_export_path = os.path.join(user_path, f"Sim_{i+1:03d}_{run_label}_{unique_id}")
-                        if not os.path.exists(unique_export_path):
-                            os.makedirs(unique_export_path)
-
-                        if user_filename.endswith('.csv'):
-                            unique_filename = user_filename.replace('.csv', f"_{run_label}_{unique_id}.csv")
-                        else:
-                            unique_filename = f"{user_filename}_{run_label}_{unique_id}.csv"
-
-                        run_params = {
-                            'num_pelados': 10,
-                            'iteraciones_por_pelado': default_iteraciones_pelado,
-                            'umbral_masa': default_umbral_masa,
-                            'umbral_nodos_final': default_umbral_nodos,
-                            'tasa_difusion': tasa_difusion,
-                            'valor_inicio': masa_total_concentrada / n_total_nodos if n_total_nodos > 0 else 0,
-                            'mostrar_graficos': False,
-                            'exportar_resultados': False,
-                            'generar_visualizaciones': generar_visualizaciones, 
-                            'usar_cfc': usar_cfc
-                        }
-                        
-                        run_params.update(method_params)
-                        run_params['carpeta_exportacion'] = unique_export_path
-                        run_params['nombre_resumen'] = unique_filename
-
-                        _, figs_run, G_surv_run, _ = ctrl_run.ejecutar_estudio_pelado(**run_params)
-                        found_seeds = list(G_surv_run.nodes())
-
-                        if generar_visualizaciones:
-                            for f_idx, fig in enumerate(figs_run):
-                                fig.layout.title.text = f"Peeling Phase: {pretty_name} | Layer {f_idx+1}"
-                            mega_recolector_figs[f"{sim_id} - PeelLayers - {run_label}"] = figs_run
-
-                    elif method_name == 'celf':
-                        target_k = method_params.get('k', base_k)
-                        if target_k == 0: target_k = 1
-
-                        G_ig = ConvertidorGrafos.a_igraph(G_original)
-                        p_celf = method_params.get('p', 0.1)
-                        mc_celf = method_params.get('mc', 100)
-                        
-                        found_seeds, _, _, _ = AnalizadorCELF.ejecutar_celf(g=G_ig, k=target_k, p=p_celf, mc=mc_celf)
-
-                    elif method_name == 'ris':
-                        target_k = method_params.get('k', base_k)
-                        if target_k == 0: target_k = 1
-
-                        G_df_edges = nx.to_pandas_edgelist(G_original)
-                        p_ris = method_params.get('p', 0.01)
-                        mc_ris = method_params.get('mc', 1000)
-
-                        found_seeds, _ = AnalizadorRIS.ris(G=G_df_edges, k=target_k, p=p_ris, mc=mc_ris)
-
-                    time_taken = time.time() - start_time_method
-                    fila_metricas[f"Time_Exec_{run_label}"] = time_taken
-
-                    met_results, figs_diff, _ = self._ejecutar_difusion_y_metricas(
-                        run_label, found_seeds, G_original.copy(), params_difusion_base, folder_sim, f"Diffusion Simulation: {pretty_name}"
-                    )
-                    
-                    fila_metricas.update(met_results)
-                    if generar_visualizaciones:
-                        mega_recolector_figs[f"{sim_id} - Difusion - {run_label}"] = figs_diff
+            opciones = {
+                'exportar_resultados': exportar_resultados,
+                'generar_visualizaciones': generar_visualizaciones,
+                'generar_visualizaciones_pelado': generar_visualizaciones_pelado,
+                'tasa_difusion': tasa_difusion,
+                'masa_total_concentrada': masa_total_concentrada,
+                'default_iteraciones_pelado': default_iteraciones_pelado,
+                'default_umbral_masa': default_umbral_masa,
+                'default_umbral_nodos': default_umbral_nodos,
+                'usar_cfc': usar_cfc,
+                'params_difusion_base': params_difusion_base,
+                'cache': cache_difusion,
+                'perfilar': perfilar,
+                'medir_memoria': medir_memoria
+            }
+            # La semilla de cada simulacion depende solo de (semilla, batch, sim): el resultado no
+            # cambia con n_workers ni con el orden en que terminan los procesos.
+            tareas = [
+                (i, batch_idx, tipo, params_especificos, params_raw_str, G_lote, folder_tipo, execution_plan, opciones,
+                 None if raiz_semillas is None else np.random.SeedSequence(raiz_semillas.entropy, spawn_key=(batch_idx, i)))
+                for i in range(n_simulaciones)
+            ]
+            if paralelo:
+                # Un grafo propio se publica una vez en memoria compartida y cada tarea solo lleva
+                # su manejador; los workers lo adjuntan sin copiar.
+                memoria = MemoriaCompartida.desde_grafo(G_lote) if G_lote is not None else None
+                if memoria is not None:
+                    tareas = [t[:5] + (memoria.manejador,) + t[6:] for t in tareas]
+                try:
+                    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                        futuros = [pool.submit(self._ejecutar_simulacion, *t) for t in tareas]
+                        resultados = [f.result() for f in futuros]
+                finally:
+                    if memoria is not None:
+                        memoria.cerrar()
+            else:
+                resultados = [self._ejecutar_simulacion(*t) for t in tareas]
 
+            tiempos_tipo = []
+            for fila_metricas, figs_sim, registro in resultados:
                 resumen_metricas.append(fila_metricas)
+                mega_recolector_figs.update(figs_sim)
+                tiempos_tipo.extend(registro.filas(Simulacion_ID=fila_metricas["Simulacion_ID"], Tipo_Grafo=tipo, Batch_ID=batch_idx))
+
+            registro_bateria = RegistroTiempos(cprofile=perfilar, memoria=medir_memoria)
 
             if generar_visualizaciones:
-                VisualizadorPelado.exportar_mega_dashboard(
-                    mega_recolector_figs,
-                    folder_tipo,
-                    f"Dashboard_Global_{tipo}.html"
-                )
+                with registro_bateria.fase("figuras"):
+                    VisualizadorPelado.exportar_mega_dashboard(
+                        mega_recolector_figs,
+                        folder_tipo,
+                        f"Dashboard_Global_{tipo}.html"
+                    )
             
             if exportar_resultados:
-                df_tipo = pd.DataFrame(resumen_metricas)
-                base_cols = ["Simulacion_ID", "Tipo_Grafo", "Batch_ID", "Total_Nodos_Inicial", "Baseline_Survivors_K"]
-                metric_cols = [c for c in df_tipo.columns if c not in base_cols]
-                metric_cols.sort()
-                final_cols = base_cols + metric_cols
-                
-                df_tipo = df_tipo.reindex(columns=final_cols)
-                
-                csv_unique_suffix = f"{int(time.time())}_{batch_idx}"
-                df_tipo.to_csv(os.path.join(folder_tipo, f"Metricas_{tipo}_{csv_unique_suffix}.csv"), index=False)
-                resumen_global.append(df_tipo)
+                with registro_bateria.fase("exportacion"):
+                    df_tipo = pd.DataFrame(resumen_metricas)
+                    base_cols = ["Simulacion_ID", "Tipo_Grafo", "Batch_ID", "Total_Nodos_Inicial", "Baseline_Survivors_K"]
+                    metric_cols = [c for c in df_tipo.columns if c not in base_cols]
+                    metric_cols.sort()
+                    final_cols = base_cols + metric_cols
+                    
+                    df_tipo = df_tipo.reindex(columns=final_cols)
+                    
+                    csv_unique_suffix = f"{int(time.time())}_{batch_idx}"
+                    df_tipo.to_csv(os.path.join(folder_tipo, f"Metricas_{tipo}_{csv_unique_suffix}.csv"), index=False)
+                    resumen_global.append(df_tipo)
+
+                tiempos_tipo.extend(registro_bateria.filas(Simulacion_ID="Bateria", Tipo_Grafo=tipo, Batch_ID=batch_idx))
+                df_tiempos = pd.DataFrame(tiempos_tipo)
+                df_tiempos.to_csv(os.path.join(folder_tipo, f"Tiempos_{tipo}_{csv_unique_suffix}.csv"), index=False)
+                tiempos_global.append(df_tiempos)
 
         if exportar_resultados and resumen_global:
             print("\nGenerando reportes consolidados...")
             df_maestro = pd.concat(resumen_global, ignore_index=True)
             df_maestro.to_csv(os.path.join(master_folder, f"Metricas_Globales_Master_{int(time.time())}.csv"), index=False)
+            pd.concat(tiempos_global, ignore_index=True).to_csv(
+                os.path.join(master_folder, f"Tiempos_Globales_{int(time.time())}.csv"), index=False
+            )
             
             numeric_cols = df_maestro.select_dtypes(include=[np.number]).columns.tolist()
             cols_to_group = ["Tipo_Grafo"]
@@ -1,14 +1,12 @@
-import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 import os
-import plotly.graph_objects as go
 import pickle
 
 
 class _Geometry3D:
     @staticmethod
     def calculate_layout(G, seed=42, k=0.15):
+        import networkx as nx
         return nx.spring_layout(G, dim=3, seed=seed, k=k)
 
     @staticmethod
@@ -40,6 +38,7 @@ class _Geometry3D:
 class _TraceBuilder:
     @staticmethod
     def create_edge_trace(coords):
+        import plotly.graph_objects as go
         x, y, z = coords
         return go.Scatter3d(
             x=x, y=y, z=z, 
@@ -49,6 +48,7 @@ class _TraceBuilder:
 
     @staticmethod
     def create_arrow_trace(vectors):
+        import plotly.graph_objects as go
         x, y, z, u, v, w = vectors
         return go.Cone(
             x=x, y=y, z=z, u=u, v=v, w=w, 
@@ -58,6 +58,7 @@ class _TraceBuilder:
 
     @staticmethod
     def create_node_trace(G, pos_3d, min_size=2, scalar=8):
+        import plotly.graph_objects as go
         masas = [G.nodes[n].get('val', 1.0) for n in G.nodes()]
         x = [pos_3d[n][0] for n in G.nodes()]
         y = [pos_3d[n][1] for n in G.nodes()]
@@ -91,6 +92,7 @@ class _DashboardManager:
 
     @staticmethod
     def create_dummy_colorbar(min_m, max_m):
+        import plotly.graph_objects as go
         return go.Scatter3d(
             x=[None], y=[None], z=[None], mode='markers',
             marker=dict(
@@ -144,6 +146,7 @@ class VisualizadorPelado:
     
     @staticmethod
     def generar_figura_3d(G, titulo, node_min=5, node_scale=3):
+        import plotly.graph_objects as go
 
         if len(G.nodes()) == 0: return None
         
@@ -178,6 +181,8 @@ class VisualizadorPelado:
 
     @staticmethod
     def renderizar(G, titulo, ruta_base, exportar_gephi=True, mostrar_grafico=False, k_layout=None, alfa_aristas=0.3, tamano_flecha=15, node_base=100, node_scale=300, formatos=["svg"]):
+        import matplotlib.pyplot as plt
+        import networkx as nx
         if len(G.nodes()) == 0: return
         
         ruta_imagenes = os.path.join(ruta_base, "imagenes_grafos")
@@ -219,6 +224,7 @@ class VisualizadorPelado:
 
     @staticmethod
     def exportar_mega_dashboard(diccionario_simulaciones, ruta_base, nombre_archivo="panel_control_total.html"):
+        import plotly.graph_objects as go
         fig_final = go.Figure()
         
         min_m, max_m = _DashboardManager.get_global_mass_range(diccionario_simulaciones)
@@ -13,5 +13,5 @@ setup(
         "numpy",
         "plotly",
     ],
-    python_requires=">=3.7",
+    python_requires=">=3.9",
 )
\ No newline at end of file
@@ -0,0 +1,41 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+from difusion_lib import ControladorPelado, GeneradorRedes
+
+
+def _grafo():
+    G = nx.gnp_random_graph(36, 0.08, seed=3, directed=True)
+    nx.set_node_attributes(G, 1.0, 'val')
+    return G
+
+
+def test_consolidado_tras_pelado_con_record_de_otro_controlador(tmp_path):
+    G = _grafo()
+    ctrl_pelado = ControladorPelado(G)
+    _, _, G_sobrevivientes, pelados = ctrl_pelado.ejecutar_estudio_pelado(
+        num_pelados=5, umbral_masa=1.0, tasa_difusion=0.5, exportar_resultados=True,
+        carpeta_exportacion=str(tmp_path)
+    )
+    assert len(G_sobrevivientes) < len(G)
+
+    _, _, record = ControladorPelado(G).ejecutar_estudio(iteraciones=20, nodos=list(G_sobrevivientes.nodes()))
+    ctrl_pelado.exportar_consolidado_nodos(pelados, record)
+
+    df = pd.read_csv(tmp_path / "reporte_resumen_pelado_por_nodo.csv")
+    assert df["Nodo"].tolist() == list(G.nodes())
+    assert np.allclose(df["record[n]"].to_numpy(), record)
+
+
+def test_consolidado_tras_pelado_csr(tmp_path):
+    G = GeneradorRedes.generar_sbm_estocastico_csr(n_total=60, semilla=1)
+    ctrl_pelado = ControladorPelado(G)
+    _, _, G_sobrevivientes, pelados = ctrl_pelado.ejecutar_estudio_pelado(
+        num_pelados=5, umbral_masa=1.0, tasa_difusion=0.5, exportar_resultados=True,
+        carpeta_exportacion=str(tmp_path)
+    )
+    _, _, record = ControladorPelado(G).ejecutar_estudio(iteraciones=20, nodos=list(G_sobrevivientes.nodes()))
+    ctrl_pelado.exportar_consolidado_nodos(pelados, record)
+
+    df = pd.read_csv(tmp_path / "reporte_resumen_pelado_por_nodo.csv")
+    assert df["Nodo"].tolist() == list(G.nodes())